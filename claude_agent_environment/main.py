@@ -1,12 +1,51 @@
 #!/usr/bin/env python3
 
 import argparse
+import collections
+import functools
 import json
 import os
+import re
+import shutil
 import subprocess
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Maximum number of repositories cloned/updated in parallel
+MAX_CLONE_WORKERS = 8
+# Maximum number of concurrent repository existence checks
+MAX_VALIDATION_WORKERS = 16
+
+# Seconds during which an existing repository isn't fetched again
+# (overridable with "fetch_ttl" in cae_config.json)
+FETCH_TTL = 300
+# File in .git whose modification time records cae's last fetch
+FETCH_MARKER = "cae_last_fetch"
+# Seconds to wait for the background update check before launching Claude
+# (matches the update check's request timeout)
+UPDATE_CHECK_GRACE = 1
+
+# Serializes progress output from repositories set up concurrently
+_PRINT_LOCK = threading.Lock()
+
+# Common Claude CLI install locations, checked when it's not in PATH
+CLAUDE_CLI_PATHS = [
+    "~/.claude/local/claude",  # Common local install
+    "/usr/local/bin/claude",  # Common system install
+]
+
+# SSH command that lets git commands share one connection per host
+SSH_MULTIPLEX_COMMAND = "ssh -o ControlMaster=auto -o ControlPath=~/.ssh/cae-%C -o ControlPersist=60s"
+
 
 def get_org_from_repos(repositories):
     """Extract GitHub organization from repository URLs."""
@@ -23,10 +62,15 @@ def get_org_from_repos(repositories):
     print("   Please ensure at least one repository has a valid GitHub URL in config.json")
     sys.exit(1)
 
+def get_config_path():
+    """Return the path of the configuration file in the current directory."""
+    return Path.cwd() / "cae_config.json"
+
+
 # Load configuration from JSON file
 def load_config():
     """Load repository configuration from JSON file in current directory."""
-    config_path = Path.cwd() / "cae_config.json"
+    config_path = get_config_path()
     
     if not config_path.exists():
         print(f"❌ Error: Configuration file not found: {config_path}")
@@ -34,167 +78,311 @@ def load_config():
         print("   See https://github.com/kgn/claude_agent_environment for configuration examples")
         sys.exit(1)
     
+    return _read_config(config_path, config_path.stat().st_mtime_ns)
+
+
+@functools.lru_cache(maxsize=8)
+def _read_config(config_path, mtime_ns):
+    """Parse a configuration file (cached per path and modification time)."""
+    loads = orjson.loads if orjson is not None else json.loads
     try:
-        with open(config_path, 'r') as f:
-            config = json.load(f)
-            return config
-    except json.JSONDecodeError as e:
+        return loads(config_path.read_bytes())
+    except ValueError as e:
         print(f"❌ Error parsing configuration file: {e}")
         print("   Please check that your cae_config.json file contains valid JSON.")
         sys.exit(1)
 
+@dataclass(frozen=True)
+class RepoRegistry:
+    """Repositories configured in cae_config.json."""
+    configs: dict  # repository name -> repository config
+
+    @functools.cached_property
+    def mapping(self):
+        """Map each configured repository name to its URL (computed once)."""
+        return {name: repo['url'] for name, repo in self.configs.items()}
+
 # Global configuration variables (will be loaded in main or set by tests)
 CONFIG = None
-REPO_MAPPING = {}
-REPO_CONFIGS = {}
+REGISTRY = RepoRegistry({})
+ORG_NAME = None
+GITHUB_BASE_URL = None
+
+def validate_fetch_ttl(config):
+    """Exit with an error unless fetch_ttl is absent or a non-negative number of seconds."""
+    fetch_ttl = config.get('fetch_ttl', FETCH_TTL)
+    if isinstance(fetch_ttl, bool) or not isinstance(fetch_ttl, (int, float)) or fetch_ttl < 0:
+        print(f"❌ Error: Invalid fetch_ttl in configuration: {fetch_ttl!r}")
+        print("   Please set fetch_ttl to a number of seconds, e.g. 300.")
+        sys.exit(1)
+
+def initialize_config(config=None):
+    """Initialize configuration from file, or from the given config dict."""
+    global CONFIG, REGISTRY, ORG_NAME, GITHUB_BASE_URL
+    CONFIG = load_config() if config is None else config
+    validate_fetch_ttl(CONFIG)
+    configs = CONFIG['repositories']
+    REGISTRY = RepoRegistry(configs)
+    ORG_NAME = get_org_from_repos(configs)
+    GITHUB_BASE_URL = f"https://github.com/{ORG_NAME}"
 
-def initialize_config():
-    """Initialize configuration from file."""
-    global CONFIG, REPO_MAPPING, REPO_CONFIGS
-    CONFIG = load_config()
-    REPO_MAPPING = {name: repo['url'] for name, repo in CONFIG['repositories'].items()}
-    REPO_CONFIGS = CONFIG['repositories']
 
+def get_command_env():
+    """Return the environment for commands, reusing SSH connections between git calls."""
+    env = dict(os.environ)
+    # Respect an SSH command chosen by the user; ControlMaster isn't
+    # supported by the Windows OpenSSH client
+    if os.name != "nt" and "GIT_SSH_COMMAND" not in env and "GIT_SSH" not in env:
+        env["GIT_SSH_COMMAND"] = SSH_MULTIPLEX_COMMAND
+    return env
 
-def run_command(cmd, cwd=None):
-    """Execute a shell command and return success status."""
+
+def get_repo_url(repo_name):
+    """Return the configured URL of a repository, defaulting to the GitHub org."""
+    return REGISTRY.mapping.get(repo_name) or f"{GITHUB_BASE_URL}/{repo_name}"
+
+
+def run_command(cmd, cwd=None, capture_stdout=True):
+    """Execute a command and return success status.
+
+    ``cmd`` is an argv list executed directly; a string is treated as a
+    shell command line (used for user-configured setup commands). Pass
+    ``capture_stdout=False`` for commands whose output is only needed on
+    failure; stdout is then discarded and only stderr is kept.
+    """
     try:
         result = subprocess.run(
             cmd,
-            shell=True,
+            shell=isinstance(cmd, str),
             cwd=cwd,
-            capture_output=True,
+            env=get_command_env(),
+            stdout=subprocess.PIPE if capture_stdout else subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
             text=True,
             check=True
         )
-        return True, result.stdout
+        return True, result.stdout or ""
     except subprocess.CalledProcessError as e:
         return False, e.stderr
+    except OSError as e:
+        # The executable itself could not be started (e.g. git not installed)
+        return False, str(e)
 
 
 def check_repo_exists(repo_url):
     """Check if a GitHub repository exists using git ls-remote."""
-    success, output = run_command(f"git ls-remote {repo_url} HEAD")
+    success, output = run_command(["git", "ls-remote", repo_url, "HEAD"])
     return success
 
 
+def build_clone_command(repo_url, repo_path, shallow=False, partial=False):
+    """Build the git clone command for a full, shallow and/or partial clone."""
+    cmd = ["git"]
+    if partial:
+        # Partial clone filters are negotiated over git protocol v2
+        cmd += ["-c", "protocol.version=2"]
+    cmd.append("clone")
+    if shallow:
+        cmd.append("--depth=1")
+    if partial:
+        cmd.append("--filter=blob:none")
+    if shallow or partial:
+        cmd.append("--no-tags")
+    return cmd + [repo_url, str(repo_path)]
+
+
+def build_fetch_command(branch_name, shallow=False):
+    """Build a git fetch command that updates only the given branch from origin."""
+    cmd = ["git", "fetch", "--no-tags"]
+    if shallow:
+        cmd.append("--depth=1")
+    return cmd + ["origin", f"+refs/heads/{branch_name}:refs/remotes/origin/{branch_name}"]
+
+
+def fetched_recently(repo_path):
+    """Check whether cae fetched the repository within the fetch TTL."""
+    if os.environ.get("CAE_FORCE_FETCH", "") not in ("", "0"):
+        return False
+    try:
+        mtime = (repo_path / ".git" / FETCH_MARKER).stat().st_mtime
+    except OSError:
+        return False
+    return time.time() - mtime < CONFIG.get('fetch_ttl', FETCH_TTL)
+
+
+def record_fetch(repo_path):
+    """Record that the repository was just fetched or cloned."""
+    try:
+        (repo_path / ".git" / FETCH_MARKER).touch()
+    except OSError:
+        pass
+
+
 def clone_or_update_repo(repo_name, repo_url, branch_name, base_dir):
-    """Clone repo if it doesn't exist, or fetch latest if it does."""
+    """Clone repo if it doesn't exist, or fetch latest if it does.
+
+    Progress messages are collected and written in one piece, so output
+    from repositories set up concurrently doesn't interleave.
+    """
+    log = []
+    try:
+        return _clone_or_update_repo(repo_name, repo_url, branch_name, base_dir, log)
+    finally:
+        with _PRINT_LOCK:
+            # A trailing blank line separates repositories
+            sys.stdout.write("\n".join(log) + "\n\n")
+            sys.stdout.flush()
+
+
+def _clone_or_update_repo(repo_name, repo_url, branch_name, base_dir, log):
+    """Set up a single repository, appending progress messages to log."""
     repo_path = base_dir / repo_name
+    repo_config = REGISTRY.configs.get(repo_name, {})
     
     if repo_path.exists():
-        print(f"📁 Repository '{repo_name}' already exists, fetching latest...")
-        success, _ = run_command("git fetch --all", cwd=repo_path)
-        if not success:
-            print(f"❌ Failed to fetch latest for {repo_name}")
-            return False
+        shallow = (repo_path / ".git" / "shallow").exists()
+        if fetched_recently(repo_path):
+            log.append(f"📁 Repository '{repo_name}' already exists and was fetched recently, skipping fetch...")
+        else:
+            log.append(f"📁 Repository '{repo_name}' already exists, fetching latest...")
+            # Only fetch the branch being checked out; if it doesn't exist on the
+            # remote yet, update origin's default refs instead
+            success, _ = run_command(build_fetch_command(branch_name, shallow), cwd=repo_path, capture_stdout=False)
+            if not success:
+                success, _ = run_command(
+                    ["git", "fetch", "--no-tags", "--prune", "origin"], cwd=repo_path, capture_stdout=False
+                )
+            if not success:
+                log.append(f"❌ Failed to fetch latest for {repo_name}")
+                return False
+            record_fetch(repo_path)
     else:
-        print(f"📥 Cloning {repo_name} from {repo_url}...")
-        success, output = run_command(f"git clone {repo_url} {repo_path}")
+        log.append(f"📥 Cloning {repo_name} from {repo_url}...")
+        shallow = repo_config.get('shallow', False)
+        # Blobless clones are the default; shallow clones are already minimal
+        partial = repo_config.get('partial', not shallow)
+        success, output = run_command(
+            build_clone_command(repo_url, repo_path, shallow, partial), capture_stdout=False
+        )
+        if not success and ("dumb http" in output or "does not support" in output):
+            # Dumb HTTP transports and some servers can't serve shallow or filtered clones
+            log.append(f"⚠️  {'Shallow' if shallow else 'Partial'} clone not supported for {repo_name}, falling back to a full clone...")
+            shallow = False
+            success, output = run_command(build_clone_command(repo_url, repo_path), capture_stdout=False)
         if not success:
             # Check if it's a 404 error (repository not found)
             if "Repository not found" in output or "404" in output:
-                print(f"❌ Repository '{repo_name}' does not exist at {repo_url}")
-                print(f"   Please verify the repository name is correct.")
-                if repo_name not in REPO_MAPPING:
-                    print(f"   Note: '{repo_name}' is not in your cae_config.json, so it was assumed to be a GitHub repository.")
+                log.append(f"❌ Repository '{repo_name}' does not exist at {repo_url}")
+                log.append(f"   Please verify the repository name is correct.")
+                if repo_name not in REGISTRY.mapping:
+                    log.append(f"   Note: '{repo_name}' is not in your cae_config.json, so it was assumed to be a GitHub repository.")
             else:
-                print(f"❌ Failed to clone {repo_name}")
-                print(f"   Error: {output.strip()}")
+                log.append(f"❌ Failed to clone {repo_name}")
+                log.append(f"   Error: {output.strip()}")
             return False
-    
-    # First check if branch exists locally
-    success, local_branches = run_command(
-        f"git branch --list {branch_name}",
-        cwd=repo_path
-    )
-    
-    branch_exists_locally = bool(local_branches.strip())
-    
-    # Check if branch exists remotely
+        
+        if shallow:
+            # Shallow clones only track the default branch, so fetch the requested
+            # branch explicitly in case it exists on the remote
+            run_command(build_fetch_command(branch_name, shallow=True), cwd=repo_path, capture_stdout=False)
+        # A fresh clone is as current as a fetch, so the next run can skip fetching
+        record_fetch(repo_path)
+    
+    # Check whether the branch exists locally and/or remotely in one call;
+    # the remote-tracking refs are up to date after the clone/fetch above
+    local_ref = f"refs/heads/{branch_name}"
+    remote_ref = f"refs/remotes/origin/{branch_name}"
     success, output = run_command(
-        f"git ls-remote --heads origin {branch_name}", 
+        ["git", "for-each-ref", "--format=%(refname)", local_ref, remote_ref],
         cwd=repo_path
     )
     
-    branch_exists_remotely = bool(output.strip())
+    refs = set(output.split())
+    branch_exists_locally = local_ref in refs
+    branch_exists_remotely = remote_ref in refs
     
     if branch_exists_locally:
         # Branch already exists locally, just checkout
-        print(f"🔄 Switching to existing local branch '{branch_name}' in {repo_name}...")
-        success, output = run_command(f"git checkout {branch_name}", cwd=repo_path)
+        log.append(f"🔄 Switching to existing local branch '{branch_name}' in {repo_name}...")
+        success, output = run_command(["git", "checkout", branch_name], cwd=repo_path)
         if not success:
-            print(f"❌ Failed to checkout branch {branch_name} in {repo_name}")
-            print(f"   Error: {output.strip()}")
+            log.append(f"❌ Failed to checkout branch {branch_name} in {repo_name}")
+            log.append(f"   Error: {output.strip()}")
             return False
         
         if branch_exists_remotely:
             # Pull latest changes from remote
-            print(f"📥 Pulling latest changes from remote...")
-            success, output = run_command(f"git pull origin {branch_name}", cwd=repo_path)
+            log.append(f"📥 Pulling latest changes from remote...")
+            success, output = run_command(
+                ["git", "pull", "origin", branch_name], cwd=repo_path, capture_stdout=False
+            )
             if not success:
-                print(f"⚠️  Warning: Could not pull latest changes: {output.strip()}")
+                log.append(f"⚠️  Warning: Could not pull latest changes: {output.strip()}")
     elif branch_exists_remotely:
         # Branch exists remotely but not locally, checkout from remote
-        print(f"🔄 Checking out branch '{branch_name}' from remote in {repo_name}...")
-        success, output = run_command(f"git checkout -b {branch_name} origin/{branch_name}", cwd=repo_path)
+        log.append(f"🔄 Checking out branch '{branch_name}' from remote in {repo_name}...")
+        success, output = run_command(["git", "checkout", "-b", branch_name, f"origin/{branch_name}"], cwd=repo_path)
         if not success:
             # Try without -b in case of detached HEAD or other issues
-            success, output = run_command(f"git checkout {branch_name}", cwd=repo_path)
+            success, output = run_command(["git", "checkout", branch_name], cwd=repo_path)
             if not success:
-                print(f"❌ Failed to checkout branch {branch_name} from remote")
-                print(f"   Error: {output.strip()}")
+                log.append(f"❌ Failed to checkout branch {branch_name} from remote")
+                log.append(f"   Error: {output.strip()}")
                 return False
     else:
         # Branch doesn't exist anywhere, create new one
-        print(f"🌿 Creating new branch '{branch_name}' in {repo_name}...")
+        log.append(f"🌿 Creating new branch '{branch_name}' in {repo_name}...")
         # First ensure we're on main/master
-        success, output = run_command("git checkout main || git checkout master", cwd=repo_path)
+        success, output = run_command(["git", "checkout", "main"], cwd=repo_path)
+        if not success:
+            success, output = run_command(["git", "checkout", "master"], cwd=repo_path)
         if not success:
-            print(f"❌ Failed to checkout main branch in {repo_name}")
-            print(f"   Error: {output.strip()}")
+            log.append(f"❌ Failed to checkout main branch in {repo_name}")
+            log.append(f"   Error: {output.strip()}")
             return False
         
         # Pull latest from main
-        run_command("git pull", cwd=repo_path)
+        run_command(["git", "pull"], cwd=repo_path, capture_stdout=False)
         
         # Create and checkout new branch
-        success, output = run_command(f"git checkout -b {branch_name}", cwd=repo_path)
+        success, output = run_command(["git", "checkout", "-b", branch_name], cwd=repo_path)
         if not success:
-            print(f"❌ Failed to create branch {branch_name} in {repo_name}")
-            print(f"   Error: {output.strip()}")
+            log.append(f"❌ Failed to create branch {branch_name} in {repo_name}")
+            log.append(f"   Error: {output.strip()}")
             return False
     
     # Run setup command if configured
-    repo_config = REPO_CONFIGS.get(repo_name, {})
     setup_cmd = repo_config.get('setup')
     if setup_cmd:
-        print(f"🔧 Running setup command for {repo_name}: {setup_cmd}")
+        log.append(f"🔧 Running setup command for {repo_name}: {setup_cmd}")
         success, output = run_command(setup_cmd, cwd=repo_path)
         if success:
-            print(f"✅ Setup completed for {repo_name}")
+            log.append(f"✅ Setup completed for {repo_name}")
         else:
-            print(f"⚠️  Setup command failed for {repo_name}, but continuing...")
-            print(f"   Error: {output}")
+            log.append(f"⚠️  Setup command failed for {repo_name}, but continuing...")
+            log.append(f"   Error: {output}")
     
-    print(f"✅ Successfully set up {repo_name} on branch '{branch_name}'")
+    log.append(f"✅ Successfully set up {repo_name} on branch '{branch_name}'")
     return True
 
 
+@functools.lru_cache(maxsize=8)
+def _ticket_pattern(ticket_prefixes):
+    """Compile the ticket ID pattern for a tuple of ticket prefixes."""
+    prefixes = '|'.join(re.escape(prefix) for prefix in ticket_prefixes)
+    # A prefix and number forming whole hyphen-separated words, e.g. eng-346
+    return re.compile(rf"(?:^|-)({prefixes})-(\d+)(?=-|$)", re.IGNORECASE)
+
+
 def extract_ticket_id(branch_name):
     """Extract Linear ticket ID from branch name."""
     # Common patterns: eng-346-description, ENG-346, eng-346
-    parts = branch_name.split('/')[-1].split('-')
-    if len(parts) >= 2:
-        # Try to find pattern based on configured prefixes
-        ticket_prefixes = CONFIG.get('ticket_prefixes', ['eng', 'des', 'ops'])
-        for i in range(len(parts) - 1):
-            if parts[i].lower() in ticket_prefixes:
-                try:
-                    int(parts[i + 1])
-                    return f"{parts[i]}-{parts[i + 1]}".upper()
-                except ValueError:
-                    continue
+    ticket_prefixes = tuple(CONFIG.get('ticket_prefixes', ['eng', 'des', 'ops']))
+    if not ticket_prefixes:
+        return None
+    match = _ticket_pattern(ticket_prefixes).search(branch_name.split('/')[-1])
+    if match:
+        return f"{match.group(1)}-{match.group(2)}".upper()
     return None
 
 
@@ -223,8 +411,13 @@ def load_template():
 {ticket_reference}
 """
     
-    with open(template_path, 'r') as f:
-        return f.read()
+    return _read_template(template_path, template_path.stat().st_mtime_ns)
+
+
+@functools.lru_cache(maxsize=8)
+def _read_template(template_path, mtime_ns):
+    """Read a template file (cached per path and modification time)."""
+    return template_path.read_text(encoding="utf-8")
 
 
 def create_claude_markdown(branch_name, repos, base_dir):
@@ -247,57 +440,84 @@ def create_claude_markdown(branch_name, repos, base_dir):
         ticket_reference = f"ticket {ticket_id}"
     
     # Build repositories list
-    repositories_list = ""
-    org_name = get_org_from_repos(CONFIG.get('repositories', {}))
-    github_base_url = f"https://github.com/{org_name}"
-    
-    for repo in repos:
-        repo_url = REPO_MAPPING.get(repo, f"{github_base_url}/{repo}")
-        repositories_list += f"- **{repo}**: {repo_url}\n"
-    
-    # Build test commands
-    test_commands = ""
-    for repo in repos:
-        config = REPO_CONFIGS.get(repo, {})
-        if config.get('test'):
-            test_commands += f"\n# {repo}\ncd {repo} && {config['test']}"
-    
-    # Build build commands
-    build_commands = ""
-    for repo in repos:
-        config = REPO_CONFIGS.get(repo, {})
-        if config.get('build'):
-            build_commands += f"\n# {repo}\ncd {repo} && {config['build']}"
-    
-    # Replace placeholders in template
-    content = template.format(
-        branch_name=branch_name,
-        ticket_section=ticket_section,
-        ticket_reference=ticket_reference,
-        repositories_list=repositories_list.rstrip(),
-        test_commands=test_commands if test_commands else "\n# No test commands configured",
-        build_commands=build_commands if build_commands else "\n# No build commands configured"
+    repositories_list = "\n".join(
+        f"- **{repo}**: {get_repo_url(repo)}"
+        for repo in repos
+    )
+    
+    # Build test and build commands
+    test_commands = "".join(
+        f"\n# {repo}\ncd {repo} && {REGISTRY.configs[repo]['test']}"
+        for repo in repos if REGISTRY.configs.get(repo, {}).get('test')
     )
+    build_commands = "".join(
+        f"\n# {repo}\ncd {repo} && {REGISTRY.configs[repo]['build']}"
+        for repo in repos if REGISTRY.configs.get(repo, {}).get('build')
+    )
+    
+    # Replace placeholders in template; unknown placeholders render as empty
+    fields = {
+        "branch_name": branch_name,
+        "ticket_section": ticket_section,
+        "ticket_reference": ticket_reference,
+        "repositories_list": repositories_list,
+        "test_commands": test_commands if test_commands else "\n# No test commands configured",
+        "build_commands": build_commands if build_commands else "\n# No build commands configured",
+    }
+    content = template.format_map(collections.defaultdict(str, fields))
     
     # Write the file
     claude_path = base_dir / "CLAUDE.md"
-    with open(claude_path, "w") as f:
-        f.write(content)
+    claude_path.write_text(content, encoding="utf-8")
     
     print(f"📝 Created CLAUDE.md file at {claude_path}")
 
 
-def main():
-    # Check for updates
-    from claude_agent_environment.version_check import display_update_notice
-    display_update_notice()
-    
-    # Initialize configuration
-    initialize_config()
-    
-    # Load available repos from config for help text
-    available_repos = ', '.join(CONFIG.get('repositories', {}).keys())
-    org_name = get_org_from_repos(CONFIG.get('repositories', {}))
+def find_claude_cli():
+    """Locate the Claude CLI executable without running it."""
+    claude_bin = shutil.which("claude")
+    if claude_bin:
+        return claude_bin
+    for path in CLAUDE_CLI_PATHS:
+        path = os.path.expanduser(path)
+        if os.path.isfile(path) and os.access(path, os.X_OK):
+            return path
+    return None
+
+
+def launch_claude(claude_bin):
+    """Run Claude in the current directory.
+
+    On POSIX this process is replaced by Claude and doesn't return. On Windows
+    Claude runs as a child process and its exit code is returned. Returns None
+    if Claude couldn't be started.
+    """
+    sys.stdout.flush()
+    if os.name == "nt":
+        # Windows has no real exec: execvp spawns Claude and exits this process,
+        # handing the console back to the shell while Claude is still using it
+        try:
+            return subprocess.run([claude_bin]).returncode
+        except OSError:
+            return None
+    try:
+        # Replace this process with Claude so it owns the terminal directly
+        os.execvp(claude_bin, [claude_bin])
+    except OSError:
+        return None
+
+
+def build_parser():
+    """Build the command line parser, describing configured repositories if loaded."""
+    if CONFIG is not None:
+        org_name = ORG_NAME
+        github_base_url = GITHUB_BASE_URL
+        available_repos = ', '.join(CONFIG.get('repositories', {}).keys())
+    else:
+        # No configuration available, e.g. `cae --help` outside a workspace
+        org_name = "GitHub"
+        github_base_url = "https://github.com/<org>"
+        available_repos = "(none, create a cae_config.json to configure repositories)"
     
     parser = argparse.ArgumentParser(
         description=f"Checkout branches across multiple {org_name} repositories",
@@ -311,7 +531,7 @@ Available repositories:
   {available_repos}
   
 You can also use any other repo name and it will try:
-  https://github.com/{org_name}/<repo-name>
+  {github_base_url}/<repo-name>
   
 Repositories will be cloned to: ./<branch-name>/
         """
@@ -331,8 +551,32 @@ Repositories will be cloned to: ./<branch-name>/
         action="store_true",
         help="Continue with valid repositories if some are not found (non-interactive mode)"
     )
+    return parser
+
+
+def main():
+    # Initialize configuration up front when it exists so the help text can
+    # list the configured repositories; otherwise defer it until after the
+    # arguments are parsed so that --help works without a cae_config.json
+    config_found = get_config_path().exists()
+    if config_found:
+        initialize_config()
+    
+    args = build_parser().parse_args()
+    
+    if not config_found:
+        # Reports the missing configuration file and exits
+        initialize_config()
+    
+    # Check for updates in the background; the notice uses the result cached
+    # by a previous run so startup never waits on the network
+    from claude_agent_environment.version_check import display_update_notice, start_background_update_check
+    update_thread = start_background_update_check()
+    display_update_notice()
     
-    args = parser.parse_args()
+    # Each repository is set up once, even if it was listed more than once;
+    # concurrent setups of the same repository would share one directory
+    args.repos = list(dict.fromkeys(args.repos))
     
     # Create a directory for the branch in the current working directory
     # Convert slashes to hyphens in branch name for directory
@@ -348,22 +592,25 @@ Repositories will be cloned to: ./<branch-name>/
     
     # First, validate all repositories exist
     invalid_repos = []
-    repo_urls = {}
-    org_name = get_org_from_repos(CONFIG.get('repositories', {}))
-    github_base_url = f"https://github.com/{org_name}"
-    
     print("🔍 Validating repositories...")
-    for repo in args.repos:
-        repo_url = REPO_MAPPING.get(repo, f"{github_base_url}/{repo}")
-        repo_urls[repo] = repo_url
-        
-        # Skip validation for repos defined in config (assume they're correct)
-        if repo in REPO_MAPPING:
-            continue
-            
-        # Check if the repository exists
-        if not check_repo_exists(repo_url):
-            invalid_repos.append(repo)
+    repo_urls = {repo: get_repo_url(repo) for repo in args.repos}
+    
+    # Skip validation for repos defined in config (assume they're correct)
+    # and for repos already cloned into the branch directory
+    to_check = [
+        (repo, url) for repo, url in repo_urls.items()
+        if repo not in REGISTRY.mapping and not (base_dir / repo).exists()
+    ]
+    
+    # Check the remaining repositories concurrently; each check is a network
+    # round-trip to the git server
+    if to_check:
+        with ThreadPoolExecutor(max_workers=min(len(to_check), MAX_VALIDATION_WORKERS)) as executor:
+            exists = dict(zip(
+                (repo for repo, _ in to_check),
+                executor.map(check_repo_exists, (url for _, url in to_check))
+            ))
+        invalid_repos = [repo for repo, _ in to_check if not exists[repo]]
     
     if invalid_repos:
         print(f"\n❌ The following repositories could not be found:")
@@ -371,7 +618,7 @@ Repositories will be cloned to: ./<branch-name>/
             print(f"   • {repo} (expected at {repo_urls[repo]})")
         print(f"\n💡 Suggestions:")
         print(f"   1. Check if the repository name is spelled correctly")
-        print(f"   2. Verify the repository exists in the {org_name} organization")
+        print(f"   2. Verify the repository exists in the {ORG_NAME} organization")
         print(f"   3. Add the repository to your cae_config.json if it's in a different location")
         
         # Ask if user wants to continue with valid repos only
@@ -391,13 +638,20 @@ Repositories will be cloned to: ./<branch-name>/
             return 1
     
     print()
+
+    # Set up repositories concurrently; git runs in subprocesses and each repo
+    # has its own working directory, so the per-repo work is independent
     success_count = 0
-    for repo in args.repos:
-        repo_url = repo_urls.get(repo, REPO_MAPPING.get(repo, f"{github_base_url}/{repo}"))
-        if clone_or_update_repo(repo, repo_url, args.branch, base_dir):
-            success_count += 1
-        print()
-    
+    max_workers = min(len(args.repos), MAX_CLONE_WORKERS)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(clone_or_update_repo, repo, repo_urls[repo], args.branch, base_dir)
+            for repo in args.repos
+        ]
+        for future in as_completed(futures):
+            if future.result():
+                success_count += 1
+
     print("-" * 50)
     print(f"✨ Successfully set up {success_count}/{len(args.repos)} repositories")
     
@@ -411,25 +665,18 @@ Repositories will be cloned to: ./<branch-name>/
         print(f"\n📂 Changing to {base_dir} and launching Claude...")
         os.chdir(base_dir)
         
-        # Try common locations for Claude CLI
-        claude_paths = [
-            "claude",  # In PATH
-            os.path.expanduser("~/.claude/local/claude"),  # Common local install
-            "/usr/local/bin/claude",  # Common system install
-        ]
-        
-        claude_found = False
-        for claude_path in claude_paths:
-            try:
-                subprocess.run([claude_path], check=False)
-                claude_found = True
-                break
-            except (FileNotFoundError, OSError):
-                continue
+        claude_bin = find_claude_cli()
+        if claude_bin:
+            # Give the update check a moment to finish writing its cache;
+            # exec discards the thread along with this process image
+            if update_thread is not None:
+                update_thread.join(timeout=UPDATE_CHECK_GRACE)
+            exit_code = launch_claude(claude_bin)
+            if exit_code is not None:
+                return exit_code
         
-        if not claude_found:
-            print("⚠️  Claude CLI not found. Please run 'claude' manually.")
-            print(f"📍 You are now in: {base_dir.absolute()}")
+        print("⚠️  Claude CLI not found. Please run 'claude' manually.")
+        print(f"📍 You are now in: {base_dir.absolute()}")
         
         return 0
     else:
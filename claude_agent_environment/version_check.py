@@ -1,13 +1,21 @@
 #!/usr/bin/env python3
 
+import functools
 import json
+import os
+import re
 import sys
+import tempfile
+import threading
+import time
 from pathlib import Path
-from urllib.request import urlopen
-from urllib.error import URLError, HTTPError
-import socket
-from packaging import version
 
+# How long a fetched latest version is reused before asking GitHub again
+CACHE_TTL = 24 * 60 * 60
+# Matches the __version__ assignment in __init__.py
+_VERSION_RE = re.compile(r'^__version__\s*=\s*["\']([^"\']+)["\']', re.MULTILINE)
+
+@functools.lru_cache(maxsize=1)
 def get_current_version():
     """Get the current installed version of claude-agent-environment."""
     try:
@@ -17,40 +25,163 @@ def get_current_version():
         # Fallback to reading from __init__.py if import fails
         init_file = Path(__file__).parent / "__init__.py"
         if init_file.exists():
-            with open(init_file, 'r') as f:
-                for line in f:
-                    if line.startswith("__version__"):
-                        return line.split("=")[1].strip().strip('"').strip("'")
+            match = _VERSION_RE.search(init_file.read_text(encoding="utf-8"))
+            if match:
+                return match.group(1)
         return "1.0.0"  # Default fallback
 
+def get_cache_path():
+    """Get the path of the cached latest version lookup."""
+    cache_home = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(cache_home) / "claude_agent_environment" / "latest_version.json"
+
+def read_cache():
+    """Read the cached latest version lookup, or None if there isn't a valid one."""
+    try:
+        data = json.loads(get_cache_path().read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if not isinstance(data, dict):
+        return None
+    fetched_at = data.get("fetched_at")
+    if isinstance(fetched_at, bool) or not isinstance(fetched_at, (int, float)):
+        return None
+    return data
+
+def write_cache(data):
+    """Atomically write the latest version lookup to the cache."""
+    cache_path = get_cache_path()
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=cache_path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            os.unlink(tmp_path)
+            raise
+    except OSError:
+        # Caching is best effort; the next run simply checks again
+        pass
+
+def update_check_disabled():
+    """Check whether the update check was disabled with CAE_SKIP_UPDATE_CHECK."""
+    return os.environ.get("CAE_SKIP_UPDATE_CHECK", "") not in ("", "0")
+
 def get_latest_version():
-    """Fetch the latest version from GitHub releases."""
+    """Get the latest version from GitHub releases, cached for CACHE_TTL seconds."""
+    if update_check_disabled():
+        return None
+    
+    cached = read_cache()
+    if cached and time.time() - cached["fetched_at"] < CACHE_TTL:
+        return cached.get("tag")
+    
+    # Networking modules are only imported when the cache can't answer
+    import socket
+    from urllib.error import URLError, HTTPError
+    from urllib.request import Request, urlopen
+    
+    # Use GitHub API to get latest release; make the request conditional on
+    # the cached response so an unchanged release comes back as an empty 304
+    url = "https://api.github.com/repos/kgn/claude_agent_environment/releases/latest"
+    headers = {"Accept": "application/vnd.github+json"}
+    if cached and cached.get("etag"):
+        headers["If-None-Match"] = cached["etag"]
+    if cached and cached.get("last_modified"):
+        headers["If-Modified-Since"] = cached["last_modified"]
+    
     try:
-        # Use GitHub API to get latest release
-        url = "https://api.github.com/repos/kgn/claude_agent_environment/releases/latest"
-        
         # Set a timeout for the request
-        with urlopen(url, timeout=2) as response:
+        with urlopen(Request(url, headers=headers), timeout=1) as response:
             data = json.loads(response.read().decode())
             # Remove 'v' prefix if present (e.g., v1.0.1 -> 1.0.1)
             tag = data.get("tag_name", "")
-            return tag.lstrip("v") if tag else None
-    except (URLError, HTTPError, socket.timeout, KeyError, json.JSONDecodeError):
+            tag = tag.lstrip("v") if tag else None
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+    except HTTPError as e:
+        if e.code == 304 and cached:
+            # Not modified: the cached tag is still the latest release
+            cached["fetched_at"] = time.time()
+            write_cache(cached)
+            return cached.get("tag")
+        return None
+    except (URLError, socket.timeout, KeyError, json.JSONDecodeError):
         # Silently fail if we can't check the version
         return None
+    
+    write_cache({
+        "tag": tag,
+        "fetched_at": time.time(),
+        "etag": etag,
+        "last_modified": last_modified,
+    })
+    return tag
+
+def get_cached_version():
+    """Get the latest version from the cache only, however old it is."""
+    if update_check_disabled():
+        return None
+    cached = read_cache()
+    return cached.get("tag") if cached else None
+
+def _refresh_cache():
+    """Refresh the cached latest version, ignoring any failure."""
+    try:
+        get_latest_version()
+    except Exception:
+        # Silently fail; a background failure must not print a traceback
+        # over the checkout output, and the next run simply checks again
+        pass
 
-def check_for_update():
-    """Check if a newer version is available and return update info."""
+def start_background_update_check():
+    """Refresh the cached latest version in a daemon thread if it is stale.
+    
+    Returns the started thread, or None if no refresh was needed.
+    """
+    if update_check_disabled():
+        return None
+    cached = read_cache()
+    if cached and time.time() - cached["fetched_at"] < CACHE_TTL:
+        return None
+    thread = threading.Thread(target=_refresh_cache, daemon=True)
+    thread.start()
+    return thread
+
+def numeric_version(value):
+    """Parse a plain numeric version like 1.2.3 into a comparable tuple.
+    
+    Trailing zeros are dropped so that 1.0 and 1.0.0 compare equal. Raises
+    ValueError for anything that isn't dot-separated integers.
+    """
+    parts = [int(part) for part in value.split(".")]
+    while len(parts) > 1 and parts[-1] == 0:
+        parts.pop()
+    return tuple(parts)
+
+def check_for_update(cached_only=False):
+    """Check if a newer version is available and return update info.
+    
+    With cached_only, compare against the cached latest version without
+    touching the network.
+    """
     try:
         current = get_current_version()
-        latest = get_latest_version()
+        latest = get_cached_version() if cached_only else get_latest_version()
         
         if latest is None:
             return None
         
-        # Use packaging.version for proper version comparison
-        current_ver = version.parse(current)
-        latest_ver = version.parse(latest)
+        try:
+            current_ver = numeric_version(current)
+            latest_ver = numeric_version(latest)
+        except ValueError:
+            # Use packaging.version for pre-releases and other suffixes
+            from packaging import version
+            current_ver = version.parse(current)
+            latest_ver = version.parse(latest)
         
         if latest_ver > current_ver:
             return {
@@ -69,8 +200,8 @@ def check_for_update():
         return None
 
 def display_update_notice():
-    """Display an update notice if a new version is available."""
-    update_info = check_for_update()
+    """Display an update notice if the cached latest version is newer."""
+    update_info = check_for_update(cached_only=True)
     
     if update_info and update_info["update_available"]:
         print(f"🆕 A new version of claude-agent-environment is available!")
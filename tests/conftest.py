@@ -15,17 +15,27 @@ def setup_test_config():
     """Automatically set up test configuration for all tests."""
     # Save original values
     original_config = main_module.CONFIG
-    original_mapping = main_module.REPO_MAPPING
-    original_configs = main_module.REPO_CONFIGS
+    original_registry = main_module.REGISTRY
+    original_org = main_module.ORG_NAME
+    original_base_url = main_module.GITHUB_BASE_URL
     
     # Set test values
     main_module.CONFIG = {'repositories': {}}
-    main_module.REPO_MAPPING = {}
-    main_module.REPO_CONFIGS = {}
+    main_module.REGISTRY = main_module.RepoRegistry({})
+    main_module.ORG_NAME = None
+    main_module.GITHUB_BASE_URL = None
     
     yield
     
     # Restore original values
     main_module.CONFIG = original_config
-    main_module.REPO_MAPPING = original_mapping
-    main_module.REPO_CONFIGS = original_configs
\ No newline at end of file
+    main_module.REGISTRY = original_registry
+    main_module.ORG_NAME = original_org
+    main_module.GITHUB_BASE_URL = original_base_url
+
+
+@pytest.fixture(autouse=True)
+def isolate_update_check(tmp_path, monkeypatch):
+    """Keep the update check off the network and out of the user's cache."""
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    monkeypatch.setenv("CAE_SKIP_UPDATE_CHECK", "1")
@@ -0,0 +1,19 @@
+"""Test doubles shared by the test modules."""
+
+
+class FakeGit:
+    """Stand-in for run_command that answers by the longest matching command prefix.
+
+    Responses don't depend on call order, so tests keep working when the git
+    operations in clone_or_update_repo are reordered or run concurrently.
+    """
+
+    def __init__(self, table):
+        self.table = table
+
+    def __call__(self, cmd, cwd=None, capture_stdout=True):
+        command = cmd if isinstance(cmd, str) else " ".join(cmd)
+        matches = [prefix for prefix in self.table if command.startswith(prefix)]
+        if not matches:
+            raise AssertionError(f"Unexpected command: {command}")
+        return self.table[max(matches, key=len)]
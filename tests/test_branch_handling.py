@@ -7,7 +7,8 @@ from pathlib import Path
 import sys
 import os
 
-from claude_agent_environment.main import clone_or_update_repo
+from tests.fakes import FakeGit
+from claude_agent_environment.main import RepoRegistry, clone_or_update_repo, fetched_recently
 
 
 class TestBranchHandling(unittest.TestCase):
@@ -15,16 +16,16 @@ class TestBranchHandling(unittest.TestCase):
     
     def setUp(self):
         """Set up test fixtures."""
-        self.test_dir = tempfile.mkdtemp()
+        self._tmp = tempfile.TemporaryDirectory()
+        self.test_dir = self._tmp.name
         self.test_path = Path(self.test_dir)
         self.repo_path = self.test_path / "test-repo"
         
     def tearDown(self):
         """Clean up test fixtures."""
-        import shutil
-        shutil.rmtree(self.test_dir, ignore_errors=True)
+        self._tmp.cleanup()
     
-    @patch('claude_agent_environment.main.REPO_CONFIGS', {})
+    @patch('claude_agent_environment.main.REGISTRY', RepoRegistry({}))
     @patch('claude_agent_environment.main.run_command')
     def test_existing_local_branch(self, mock_run_command):
         """Test handling of existing local branch."""
@@ -32,13 +33,12 @@ class TestBranchHandling(unittest.TestCase):
         self.repo_path.mkdir(parents=True)
         
         # Mock command responses
-        mock_run_command.side_effect = [
-            (True, ""),  # git fetch --all
-            (True, "  test-branch"),  # git branch --list (branch exists locally)
-            (True, "abc123 refs/heads/test-branch"),  # git ls-remote (exists remotely)
-            (True, ""),  # git checkout test-branch
-            (True, ""),  # git pull origin test-branch
-        ]
+        mock_run_command.side_effect = FakeGit({
+            "git fetch": (True, ""),
+            "git for-each-ref": (True, "refs/heads/test-branch\nrefs/remotes/origin/test-branch"),  # exists locally and remotely
+            "git checkout": (True, ""),
+            "git pull": (True, ""),
+        })
         
         result = clone_or_update_repo(
             "test-repo",
@@ -50,13 +50,105 @@ class TestBranchHandling(unittest.TestCase):
         self.assertTrue(result)
         
         # Verify correct git commands were called
-        calls = mock_run_command.call_args_list
-        self.assertIn(
-            call("git checkout test-branch", cwd=self.repo_path),
-            calls
+        mock_run_command.assert_has_calls([
+            call(["git", "checkout", "test-branch"], cwd=self.repo_path),
+            call(["git", "pull", "origin", "test-branch"], cwd=self.repo_path, capture_stdout=False),
+        ], any_order=True)
+    
+    @patch('claude_agent_environment.main.REGISTRY', RepoRegistry({}))
+    @patch('claude_agent_environment.main.run_command')
+    def test_branch_existence_checked_with_one_local_query(self, mock_run_command):
+        """Test that local and remote branch existence come from a single for-each-ref."""
+        self.repo_path.mkdir(parents=True)
+        
+        mock_run_command.side_effect = FakeGit({
+            "git fetch": (True, ""),
+            "git for-each-ref": (True, "refs/heads/test-branch\nrefs/remotes/origin/test-branch"),
+            "git checkout": (True, ""),
+            "git pull": (True, ""),
+        })
+        
+        clone_or_update_repo(
+            "test-repo",
+            "https://github.com/user/test-repo",
+            "test-branch",
+            self.test_path
         )
+        
+        commands = [c[0][0] for c in mock_run_command.call_args_list]
+        self.assertEqual(
+            commands[1],
+            ["git", "for-each-ref", "--format=%(refname)",
+             "refs/heads/test-branch", "refs/remotes/origin/test-branch"]
+        )
+        self.assertFalse(any(cmd[1] in ("ls-remote", "branch") for cmd in commands))
+    
+    @patch('claude_agent_environment.main.REGISTRY', RepoRegistry({}))
+    @patch('claude_agent_environment.main.run_command')
+    def test_recent_fetch_skipped(self, mock_run_command):
+        """Test that a repository fetched within the fetch TTL isn't fetched again."""
+        (self.repo_path / ".git").mkdir(parents=True)
+        (self.repo_path / ".git" / "cae_last_fetch").touch()
+        
+        mock_run_command.side_effect = FakeGit({
+            "git for-each-ref": (True, "refs/heads/test-branch\nrefs/remotes/origin/test-branch"),
+            "git checkout": (True, ""),
+            "git pull": (True, ""),
+        })
+        
+        with patch.dict(os.environ, {"CAE_FORCE_FETCH": ""}):
+            result = clone_or_update_repo(
+                "test-repo",
+                "https://github.com/user/test-repo",
+                "test-branch",
+                self.test_path
+            )
+        
+        self.assertTrue(result)
+        commands = [c[0][0] for c in mock_run_command.call_args_list]
+        self.assertFalse(any(cmd[1] == "fetch" for cmd in commands))
     
-    @patch('claude_agent_environment.main.REPO_CONFIGS', {})
+    @patch('claude_agent_environment.main.REGISTRY', RepoRegistry({}))
+    @patch('claude_agent_environment.main.run_command')
+    def test_fetch_records_marker_and_can_be_forced(self, mock_run_command):
+        """Test that a fetch touches the marker and CAE_FORCE_FETCH ignores it."""
+        (self.repo_path / ".git").mkdir(parents=True)
+        marker = self.repo_path / ".git" / "cae_last_fetch"
+        
+        mock_run_command.return_value = (True, "refs/heads/test-branch")
+        
+        with patch.dict(os.environ, {"CAE_FORCE_FETCH": ""}):
+            clone_or_update_repo("test-repo", "https://github.com/user/test-repo", "test-branch", self.test_path)
+        self.assertTrue(marker.exists())
+        
+        mock_run_command.reset_mock()
+        with patch.dict(os.environ, {"CAE_FORCE_FETCH": "1"}):
+            clone_or_update_repo("test-repo", "https://github.com/user/test-repo", "test-branch", self.test_path)
+        
+        self.assertEqual(mock_run_command.call_args_list[0][0][0][:2], ["git", "fetch"])
+    
+    @patch('claude_agent_environment.main.REGISTRY', RepoRegistry({}))
+    @patch('claude_agent_environment.main.run_command')
+    def test_clone_records_marker(self, mock_run_command):
+        """Test that a fresh clone counts as a recent fetch for the next run."""
+        fake_git = FakeGit({
+            "git -c protocol.version=2 clone": (True, ""),
+            "git for-each-ref": (True, "refs/remotes/origin/test-branch"),
+            "git checkout": (True, ""),
+        })
+        
+        def run_git(cmd, cwd=None, capture_stdout=True):
+            if "clone" in cmd:
+                (self.repo_path / ".git").mkdir(parents=True)
+            return fake_git(cmd, cwd, capture_stdout)
+        
+        mock_run_command.side_effect = run_git
+        
+        with patch.dict(os.environ, {"CAE_FORCE_FETCH": ""}):
+            clone_or_update_repo("test-repo", "https://github.com/user/test-repo", "test-branch", self.test_path)
+            self.assertTrue(fetched_recently(self.repo_path))
+    
+    @patch('claude_agent_environment.main.REGISTRY', RepoRegistry({}))
     @patch('claude_agent_environment.main.run_command')
     def test_existing_remote_branch_not_local(self, mock_run_command):
         """Test checking out remote branch that doesn't exist locally."""
@@ -64,12 +156,11 @@ class TestBranchHandling(unittest.TestCase):
         self.repo_path.mkdir(parents=True)
         
         # Mock command responses
-        mock_run_command.side_effect = [
-            (True, ""),  # git fetch --all
-            (True, ""),  # git branch --list (no local branch)
-            (True, "abc123 refs/heads/test-branch"),  # git ls-remote (exists remotely)
-            (True, ""),  # git checkout -b test-branch origin/test-branch
-        ]
+        mock_run_command.side_effect = FakeGit({
+            "git fetch": (True, ""),
+            "git for-each-ref": (True, "refs/remotes/origin/test-branch"),  # exists remotely only
+            "git checkout": (True, ""),
+        })
         
         result = clone_or_update_repo(
             "test-repo",
@@ -81,13 +172,11 @@ class TestBranchHandling(unittest.TestCase):
         self.assertTrue(result)
         
         # Verify checkout from remote was attempted
-        calls = mock_run_command.call_args_list
-        self.assertIn(
-            call("git checkout -b test-branch origin/test-branch", cwd=self.repo_path),
-            calls
-        )
+        mock_run_command.assert_has_calls([
+            call(["git", "checkout", "-b", "test-branch", "origin/test-branch"], cwd=self.repo_path),
+        ], any_order=True)
     
-    @patch('claude_agent_environment.main.REPO_CONFIGS', {})
+    @patch('claude_agent_environment.main.REGISTRY', RepoRegistry({}))
     @patch('claude_agent_environment.main.run_command')
     def test_create_new_branch(self, mock_run_command):
         """Test creating a new branch that doesn't exist anywhere."""
@@ -95,14 +184,13 @@ class TestBranchHandling(unittest.TestCase):
         self.repo_path.mkdir(parents=True)
         
         # Mock command responses
-        mock_run_command.side_effect = [
-            (True, ""),  # git fetch --all
-            (True, ""),  # git branch --list (no local branch)
-            (True, ""),  # git ls-remote (no remote branch)
-            (True, ""),  # git checkout main || git checkout master
-            (True, ""),  # git pull
-            (True, ""),  # git checkout -b test-branch
-        ]
+        mock_run_command.side_effect = FakeGit({
+            "git fetch --no-tags origin": (False, "fatal: couldn't find remote ref refs/heads/test-branch"),
+            "git fetch --no-tags --prune origin": (True, ""),
+            "git for-each-ref": (True, ""),  # no local or remote branch
+            "git checkout": (True, ""),
+            "git pull": (True, ""),
+        })
         
         result = clone_or_update_repo(
             "test-repo",
@@ -113,14 +201,58 @@ class TestBranchHandling(unittest.TestCase):
         
         self.assertTrue(result)
         
-        # Verify new branch creation
+        # Verify only the requested branch was fetched before falling back
         calls = mock_run_command.call_args_list
-        self.assertIn(
-            call("git checkout -b test-branch", cwd=self.repo_path),
-            calls
+        self.assertEqual(
+            calls[:2],
+            [
+                call(["git", "fetch", "--no-tags", "origin",
+                      "+refs/heads/test-branch:refs/remotes/origin/test-branch"],
+                     cwd=self.repo_path, capture_stdout=False),
+                call(["git", "fetch", "--no-tags", "--prune", "origin"],
+                     cwd=self.repo_path, capture_stdout=False),
+            ]
+        )
+        
+        # Verify new branch creation
+        mock_run_command.assert_has_calls([
+            call(["git", "checkout", "main"], cwd=self.repo_path),
+            call(["git", "pull"], cwd=self.repo_path, capture_stdout=False),
+            call(["git", "checkout", "-b", "test-branch"], cwd=self.repo_path),
+        ], any_order=True)
+    
+    @patch('claude_agent_environment.main.REGISTRY', RepoRegistry({}))
+    @patch('claude_agent_environment.main.run_command')
+    def test_create_new_branch_from_master(self, mock_run_command):
+        """Test falling back to master when the repo has no main branch."""
+        # Create repo directory
+        self.repo_path.mkdir(parents=True)
+        
+        # Mock command responses
+        mock_run_command.side_effect = FakeGit({
+            "git fetch": (True, ""),
+            "git for-each-ref": (True, ""),  # no local or remote branch
+            "git checkout main": (False, "error: pathspec 'main' did not match"),
+            "git checkout": (True, ""),
+            "git pull": (True, ""),
+        })
+        
+        result = clone_or_update_repo(
+            "test-repo",
+            "https://github.com/user/test-repo",
+            "test-branch",
+            self.test_path
         )
+        
+        self.assertTrue(result)
+        
+        mock_run_command.assert_has_calls([
+            call(["git", "checkout", "master"], cwd=self.repo_path),
+            call(["git", "pull"], cwd=self.repo_path, capture_stdout=False),
+            call(["git", "checkout", "-b", "test-branch"], cwd=self.repo_path),
+        ], any_order=True)
     
-    @patch('claude_agent_environment.main.REPO_CONFIGS', {})
+    @patch('claude_agent_environment.main.REGISTRY', RepoRegistry({}))
     @patch('claude_agent_environment.main.run_command')
     def test_branch_creation_failure(self, mock_run_command):
         """Test handling of branch creation failure."""
@@ -128,14 +260,13 @@ class TestBranchHandling(unittest.TestCase):
         self.repo_path.mkdir(parents=True)
         
         # Mock command responses with failure
-        mock_run_command.side_effect = [
-            (True, ""),  # git fetch --all
-            (True, ""),  # git branch --list (no local branch)
-            (True, ""),  # git ls-remote (no remote branch)
-            (True, ""),  # git checkout main || git checkout master
-            (True, ""),  # git pull
-            (False, "fatal: A branch named 'test-branch' already exists"),  # git checkout -b fails
-        ]
+        mock_run_command.side_effect = FakeGit({
+            "git fetch": (True, ""),
+            "git for-each-ref": (True, ""),  # no local or remote branch
+            "git checkout": (True, ""),
+            "git pull": (True, ""),
+            "git checkout -b": (False, "fatal: A branch named 'test-branch' already exists"),
+        })
         
         result = clone_or_update_repo(
             "test-repo",
@@ -146,19 +277,17 @@ class TestBranchHandling(unittest.TestCase):
         
         self.assertFalse(result)
     
-    @patch('claude_agent_environment.main.REPO_CONFIGS', {})
+    @patch('claude_agent_environment.main.REGISTRY', RepoRegistry({}))
     @patch('claude_agent_environment.main.run_command')
     def test_clone_and_create_branch(self, mock_run_command):
         """Test cloning a new repo and creating a branch."""
         # Mock command responses for clone and branch creation
-        mock_run_command.side_effect = [
-            (True, ""),  # git clone
-            (True, ""),  # git branch --list (no local branch)
-            (True, ""),  # git ls-remote (no remote branch)
-            (True, ""),  # git checkout main || git checkout master
-            (True, ""),  # git pull
-            (True, ""),  # git checkout -b test-branch
-        ]
+        mock_run_command.side_effect = FakeGit({
+            "git -c protocol.version=2 clone": (True, ""),
+            "git for-each-ref": (True, ""),  # no local or remote branch
+            "git checkout": (True, ""),
+            "git pull": (True, ""),
+        })
         
         result = clone_or_update_repo(
             "test-repo",
@@ -169,14 +298,212 @@ class TestBranchHandling(unittest.TestCase):
         
         self.assertTrue(result)
         
-        # Verify clone was called
+        # Verify a blobless clone was made
         calls = mock_run_command.call_args_list
         self.assertEqual(
             calls[0],
-            call(f"git clone https://github.com/user/test-repo {self.repo_path}")
+            call(["git", "-c", "protocol.version=2", "clone", "--filter=blob:none", "--no-tags",
+                  "https://github.com/user/test-repo", str(self.repo_path)], capture_stdout=False)
         )
     
-    @patch('claude_agent_environment.main.REPO_CONFIGS', {'test-repo': {'setup': 'npm install'}})
+    @patch('claude_agent_environment.main.REGISTRY', RepoRegistry({'test-repo': {'shallow': True}}))
+    @patch('claude_agent_environment.main.run_command')
+    def test_shallow_clone_fetches_remote_branch(self, mock_run_command):
+        """Test that shallow repos are cloned with depth 1 and fetch the branch explicitly."""
+        mock_run_command.side_effect = FakeGit({
+            "git clone --depth=1": (True, ""),
+            "git fetch --no-tags --depth=1 origin": (True, ""),
+            "git for-each-ref": (True, "refs/remotes/origin/test-branch"),  # exists remotely only
+            "git checkout": (True, ""),
+        })
+
+        result = clone_or_update_repo(
+            "test-repo",
+            "https://github.com/user/test-repo",
+            "test-branch",
+            self.test_path
+        )
+
+        self.assertTrue(result)
+
+        calls = mock_run_command.call_args_list
+        self.assertEqual(
+            calls[0],
+            call(
+                ["git", "clone", "--depth=1", "--no-tags", "https://github.com/user/test-repo", str(self.repo_path)],
+                capture_stdout=False
+            )
+        )
+        self.assertEqual(
+            calls[1],
+            call(
+                ["git", "fetch", "--no-tags", "--depth=1", "origin",
+                 "+refs/heads/test-branch:refs/remotes/origin/test-branch"],
+                cwd=self.repo_path,
+                capture_stdout=False
+            )
+        )
+
+    @patch('claude_agent_environment.main.REGISTRY', RepoRegistry({}))
+    @patch('claude_agent_environment.main.run_command')
+    def test_existing_shallow_repo_fetches_branch_shallowly(self, mock_run_command):
+        """Test that updating a shallow checkout keeps the fetch shallow."""
+        (self.repo_path / ".git").mkdir(parents=True)
+        (self.repo_path / ".git" / "shallow").write_text("")
+
+        mock_run_command.side_effect = FakeGit({
+            "git fetch --no-tags --depth=1 origin": (True, ""),
+            "git for-each-ref": (True, "refs/heads/test-branch\nrefs/remotes/origin/test-branch"),
+            "git checkout": (True, ""),
+            "git pull": (True, ""),
+        })
+
+        result = clone_or_update_repo(
+            "test-repo",
+            "https://github.com/user/test-repo",
+            "test-branch",
+            self.test_path
+        )
+
+        self.assertTrue(result)
+
+        calls = mock_run_command.call_args_list
+        self.assertEqual(
+            calls[0],
+            call(
+                ["git", "fetch", "--no-tags", "--depth=1", "origin",
+                 "+refs/heads/test-branch:refs/remotes/origin/test-branch"],
+                cwd=self.repo_path,
+                capture_stdout=False
+            )
+        )
+
+    @patch('claude_agent_environment.main.REGISTRY', RepoRegistry({'test-repo': {'shallow': True}}))
+    @patch('claude_agent_environment.main.run_command')
+    def test_shallow_clone_falls_back_to_full_clone(self, mock_run_command):
+        """Test falling back to a full clone when the server rejects shallow clones."""
+        mock_run_command.side_effect = FakeGit({
+            "git clone --depth=1": (False, "fatal: dumb http transport does not support shallow capabilities"),
+            "git clone": (True, ""),  # full clone
+            "git for-each-ref": (True, ""),  # no local or remote branch
+            "git checkout": (True, ""),
+            "git pull": (True, ""),
+        })
+
+        result = clone_or_update_repo(
+            "test-repo",
+            "https://github.com/user/test-repo",
+            "test-branch",
+            self.test_path
+        )
+
+        self.assertTrue(result)
+
+        calls = mock_run_command.call_args_list
+        self.assertEqual(
+            calls[1],
+            call(["git", "clone", "https://github.com/user/test-repo", str(self.repo_path)], capture_stdout=False)
+        )
+
+    @patch('claude_agent_environment.main.REGISTRY', RepoRegistry({'test-repo': {'partial': True}}))
+    @patch('claude_agent_environment.main.run_command')
+    def test_partial_clone(self, mock_run_command):
+        """Test that partial repos are cloned without blobs over protocol v2."""
+        mock_run_command.side_effect = FakeGit({
+            "git -c protocol.version=2 clone": (True, ""),
+            "git for-each-ref": (True, ""),  # no local or remote branch
+            "git checkout": (True, ""),
+            "git pull": (True, ""),
+        })
+
+        result = clone_or_update_repo(
+            "test-repo",
+            "https://github.com/user/test-repo",
+            "test-branch",
+            self.test_path
+        )
+
+        self.assertTrue(result)
+
+        calls = mock_run_command.call_args_list
+        self.assertEqual(
+            calls[0],
+            call(["git", "-c", "protocol.version=2", "clone", "--filter=blob:none", "--no-tags",
+                  "https://github.com/user/test-repo", str(self.repo_path)], capture_stdout=False)
+        )
+
+    @patch('claude_agent_environment.main.REGISTRY', RepoRegistry({}))
+    @patch('claude_agent_environment.main.run_command')
+    def test_progress_written_in_one_piece(self, mock_run_command):
+        """Test that progress messages are buffered and written with a single write."""
+        mock_run_command.side_effect = FakeGit({
+            "git -c protocol.version=2 clone": (True, ""),
+            "git for-each-ref": (True, ""),  # no local or remote branch
+            "git checkout": (True, ""),
+            "git pull": (True, ""),
+        })
+
+        with patch('claude_agent_environment.main.sys.stdout') as mock_stdout:
+            result = clone_or_update_repo(
+                "test-repo",
+                "https://github.com/user/test-repo",
+                "test-branch",
+                self.test_path
+            )
+
+        self.assertTrue(result)
+        mock_stdout.write.assert_called_once()
+        output = mock_stdout.write.call_args[0][0]
+        self.assertIn("📥 Cloning test-repo from https://github.com/user/test-repo...", output)
+        self.assertIn("✅ Successfully set up test-repo on branch 'test-branch'", output)
+        self.assertTrue(output.endswith("\n\n"))
+
+    @patch('claude_agent_environment.main.REGISTRY', RepoRegistry({}))
+    @patch('claude_agent_environment.main.run_command')
+    def test_partial_clone_falls_back_to_full_clone(self, mock_run_command):
+        """Test falling back to a full clone when the server doesn't support filters."""
+        mock_run_command.side_effect = FakeGit({
+            "git -c protocol.version=2 clone": (False, "fatal: server does not support filter"),
+            "git clone": (True, ""),  # full clone
+            "git for-each-ref": (True, ""),  # no local or remote branch
+            "git checkout": (True, ""),
+            "git pull": (True, ""),
+        })
+
+        result = clone_or_update_repo(
+            "test-repo",
+            "https://github.com/user/test-repo",
+            "test-branch",
+            self.test_path
+        )
+
+        self.assertTrue(result)
+
+        calls = mock_run_command.call_args_list
+        self.assertEqual(
+            calls[1],
+            call(["git", "clone", "https://github.com/user/test-repo", str(self.repo_path)], capture_stdout=False)
+        )
+
+    @patch('claude_agent_environment.main.REGISTRY', RepoRegistry({'test-repo': {'partial': False}}))
+    @patch('claude_agent_environment.main.run_command')
+    def test_partial_clone_opt_out(self, mock_run_command):
+        """Test that partial clones can be disabled per repository."""
+        mock_run_command.return_value = (True, "")
+
+        clone_or_update_repo(
+            "test-repo",
+            "https://github.com/user/test-repo",
+            "test-branch",
+            self.test_path
+        )
+
+        self.assertEqual(
+            mock_run_command.call_args_list[0],
+            call(["git", "clone", "https://github.com/user/test-repo", str(self.repo_path)], capture_stdout=False)
+        )
+
+    @patch('claude_agent_environment.main.REGISTRY', RepoRegistry({'test-repo': {'setup': 'npm install'}}))
     @patch('claude_agent_environment.main.run_command')
     def test_setup_command_execution(self, mock_run_command):
         """Test that setup commands are executed after branch setup."""
@@ -184,15 +511,13 @@ class TestBranchHandling(unittest.TestCase):
         self.repo_path.mkdir(parents=True)
         
         # Mock command responses
-        mock_run_command.side_effect = [
-            (True, ""),  # git fetch --all
-            (True, ""),  # git branch --list
-            (True, ""),  # git ls-remote
-            (True, ""),  # git checkout main || git checkout master
-            (True, ""),  # git pull
-            (True, ""),  # git checkout -b test-branch
-            (True, ""),  # npm install (setup command)
-        ]
+        mock_run_command.side_effect = FakeGit({
+            "git fetch": (True, ""),
+            "git for-each-ref": (True, ""),
+            "git checkout": (True, ""),
+            "git pull": (True, ""),
+            "npm install": (True, ""),  # setup command
+        })
         
         result = clone_or_update_repo(
             "test-repo",
@@ -204,11 +529,9 @@ class TestBranchHandling(unittest.TestCase):
         self.assertTrue(result)
         
         # Verify setup command was called
-        calls = mock_run_command.call_args_list
-        self.assertIn(
+        mock_run_command.assert_has_calls([
             call("npm install", cwd=self.repo_path),
-            calls
-        )
+        ], any_order=True)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,116 @@
+"""Unit tests for CLAUDE.md generation."""
+
+import unittest
+from unittest.mock import patch
+import tempfile
+from pathlib import Path
+
+from claude_agent_environment.main import create_claude_markdown, initialize_config
+
+
+TEMPLATE = """# {branch_name}
+{ticket_section}
+
+## Repositories
+{repositories_list}
+
+## Task
+{ticket_reference}
+
+## Testing
+{test_commands}
+
+## Building
+{build_commands}
+"""
+
+
+@patch('claude_agent_environment.main.load_template', return_value=TEMPLATE)
+class TestClaudeMarkdown(unittest.TestCase):
+    """Test rendering the CLAUDE.md template for a workspace."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self._tmp = tempfile.TemporaryDirectory()
+        self.test_dir = self._tmp.name
+        self.test_path = Path(self.test_dir)
+
+        initialize_config({
+            "repositories": {
+                "frontend": {
+                    "url": "https://github.com/TestOrg/frontend",
+                    "test": "npm test",
+                    "build": "npm run build"
+                },
+                "backend": {
+                    "url": "https://github.com/TestOrg/backend",
+                    "test": "pytest"
+                }
+            },
+            "linear_base_url": "https://linear.app/test/issue",
+            "ticket_prefixes": ["eng"]
+        })
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        self._tmp.cleanup()
+
+    def render(self, branch_name, repos):
+        """Create CLAUDE.md and return its contents."""
+        create_claude_markdown(branch_name, repos, self.test_path)
+        return (self.test_path / "CLAUDE.md").read_text()
+
+    def test_repositories_and_commands_listed(self, mock_template):
+        """Test that repositories and their commands are listed in order."""
+        content = self.render("eng-42-feature", ["frontend", "backend", "docs"])
+
+        self.assertIn(
+            "## Repositories\n"
+            "- **frontend**: https://github.com/TestOrg/frontend\n"
+            "- **backend**: https://github.com/TestOrg/backend\n"
+            "- **docs**: https://github.com/TestOrg/docs\n\n",
+            content
+        )
+        self.assertIn(
+            "## Testing\n\n"
+            "# frontend\ncd frontend && npm test\n"
+            "# backend\ncd backend && pytest\n",
+            content
+        )
+        self.assertIn(
+            "## Building\n\n"
+            "# frontend\ncd frontend && npm run build\n",
+            content
+        )
+
+    def test_ticket_linked(self, mock_template):
+        """Test that ticket IDs are linked to Linear."""
+        content = self.render("eng-42-feature", ["backend"])
+
+        self.assertIn("- **Linear URL**: https://linear.app/test/issue/ENG-42", content)
+        self.assertIn("Linear ticket [ENG-42](https://linear.app/test/issue/ENG-42)", content)
+
+    def test_written_as_utf8(self, mock_template):
+        """Test that CLAUDE.md is UTF-8 encoded regardless of the locale."""
+        create_claude_markdown("eng-42-café", ["backend"], self.test_path)
+
+        self.assertIn("# eng-42-café".encode("utf-8"), (self.test_path / "CLAUDE.md").read_bytes())
+
+    def test_no_commands_configured(self, mock_template):
+        """Test placeholders when no test or build commands are configured."""
+        content = self.render("feature-branch", ["docs"])
+
+        self.assertIn("# No test commands configured", content)
+        self.assertIn("# No build commands configured", content)
+
+    def test_custom_template_placeholders(self, mock_template):
+        """Test that omitted and unknown placeholders don't break rendering."""
+        mock_template.return_value = "# {branch_name}\n{{literal}} {unknown_field}\n"
+
+        content = self.render("feature-branch", ["backend"])
+
+        self.assertEqual(content, "# feature-branch\n{literal} \n")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,144 @@
+"""Unit tests for configuration and template loading."""
+
+import unittest
+from unittest.mock import patch
+import tempfile
+import json
+from pathlib import Path
+import os
+import io
+
+import claude_agent_environment.main as main_module
+from claude_agent_environment.main import load_config, load_template, main
+
+
+class TestConfigLoading(unittest.TestCase):
+    """Test loading cae_config.json and claude_template.md from the working directory."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.test_dir = self._tmp.name
+        self.test_path = Path(self.test_dir)
+        self.config_path = self.test_path / "cae_config.json"
+
+        # Change to test directory; the cleanup restores it even if a test
+        # fails, before the directory is removed
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(self.test_path)
+
+    def write_config(self, config, mtime_ns):
+        """Write a config file with an explicit modification time."""
+        with open(self.config_path, 'w') as f:
+            json.dump(config, f)
+        os.utime(self.config_path, ns=(mtime_ns, mtime_ns))
+
+    def test_config_parsed_once_while_unchanged(self):
+        """Test that repeated loads of an unchanged config reuse the parsed result."""
+        self.write_config({"repositories": {}}, 1_000_000_000)
+
+        first = load_config()
+        second = load_config()
+
+        self.assertEqual(first, {"repositories": {}})
+        self.assertIs(first, second)
+
+    def test_config_reloaded_after_modification(self):
+        """Test that a modified config file is parsed again."""
+        self.write_config({"repositories": {}}, 1_000_000_000)
+        load_config()
+
+        self.write_config({"repositories": {}, "ticket_prefixes": ["bug"]}, 2_000_000_000)
+        config = load_config()
+
+        self.assertEqual(config["ticket_prefixes"], ["bug"])
+
+    def test_config_parsed_with_orjson_when_available(self):
+        """Test that orjson parses the raw config bytes when it is installed."""
+        self.write_config({"repositories": {}}, 1_000_000_000)
+
+        with patch('claude_agent_environment.main.orjson') as mock_orjson:
+            mock_orjson.loads.return_value = {"repositories": {}}
+            config = load_config()
+
+        self.assertEqual(config, {"repositories": {}})
+        mock_orjson.loads.assert_called_once_with(self.config_path.read_bytes())
+
+    @patch('claude_agent_environment.main.orjson', None)
+    def test_config_parsed_with_json_fallback(self):
+        """Test that the standard json module parses the config without orjson."""
+        self.write_config({"repositories": {"café": {}}}, 1_000_000_000)
+
+        self.assertEqual(load_config(), {"repositories": {"café": {}}})
+
+    def test_missing_config_exits(self):
+        """Test that a missing config file exits with an error."""
+        with self.assertRaises(SystemExit):
+            load_config()
+
+    def test_invalid_config_exits(self):
+        """Test that invalid JSON exits with an error."""
+        self.config_path.write_text("{not json")
+
+        with self.assertRaises(SystemExit):
+            load_config()
+
+    def test_template_loaded_from_cwd(self):
+        """Test that a template in the working directory takes precedence."""
+        template_path = self.test_path / "claude_template.md"
+        template_path.write_text("# {branch_name}")
+        os.utime(template_path, ns=(1_000_000_000, 1_000_000_000))
+        self.assertEqual(load_template(), "# {branch_name}")
+
+        template_path.write_text("# Task: {branch_name}")
+        os.utime(template_path, ns=(2_000_000_000, 2_000_000_000))
+        self.assertEqual(load_template(), "# Task: {branch_name}")
+
+    @patch('claude_agent_environment.version_check.display_update_notice')
+    @patch('sys.argv', ['cae', '--help'])
+    def test_help_without_config(self, mock_update_notice):
+        """Test that --help works without a cae_config.json."""
+        main_module.CONFIG = None
+
+        with patch('sys.stdout', new_callable=io.StringIO) as mock_stdout:
+            with self.assertRaises(SystemExit) as cm:
+                main()
+
+        self.assertEqual(cm.exception.code, 0)
+        self.assertIn("create a cae_config.json", mock_stdout.getvalue())
+        mock_update_notice.assert_not_called()
+
+    @patch('claude_agent_environment.version_check.display_update_notice')
+    @patch('sys.argv', ['cae', '--help'])
+    def test_help_lists_configured_repositories(self, mock_update_notice):
+        """Test that --help lists repositories when a config is present."""
+        main_module.CONFIG = None
+        self.write_config({
+            "repositories": {
+                "frontend": {"url": "https://github.com/TestOrg/frontend"}
+            }
+        }, 1_000_000_000)
+
+        with patch('sys.stdout', new_callable=io.StringIO) as mock_stdout:
+            with self.assertRaises(SystemExit):
+                main()
+
+        self.assertIn("frontend", mock_stdout.getvalue())
+        self.assertIn("https://github.com/TestOrg/<repo-name>", mock_stdout.getvalue())
+
+    @patch('claude_agent_environment.version_check.display_update_notice')
+    @patch('sys.argv', ['cae', 'test-branch', 'frontend'])
+    def test_checkout_without_config_exits(self, mock_update_notice):
+        """Test that a checkout without a config still reports the missing file."""
+        main_module.CONFIG = None
+
+        with self.assertRaises(SystemExit) as cm:
+            main()
+
+        self.assertEqual(cm.exception.code, 1)
+        self.assertFalse((self.test_path / "test-branch").exists())
+
+
+if __name__ == '__main__':
+    unittest.main()
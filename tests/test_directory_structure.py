@@ -1,15 +1,28 @@
 """Unit tests for directory structure creation."""
 
 import unittest
-from unittest.mock import patch, MagicMock, call
+from unittest.mock import patch, call
 import tempfile
 import json
 from pathlib import Path
 import sys
 import os
 import argparse
+import threading
 
-from claude_agent_environment.main import main, initialize_config
+from claude_agent_environment.main import UPDATE_CHECK_GRACE, main, initialize_config
+
+
+def with_std_mocks(fn):
+    """Patch config loading, repo validation, repo setup and the Claude launch.
+
+    The mocks are passed as (mock_clone, mock_check_exists, mock_execvp,
+    mock_init_config), after those of any decorators applied below this one.
+    """
+    fn = patch('claude_agent_environment.main.clone_or_update_repo')(fn)
+    fn = patch('claude_agent_environment.main.check_repo_exists')(fn)
+    fn = patch('claude_agent_environment.main.os.execvp')(fn)
+    return patch('claude_agent_environment.main.initialize_config')(fn)
 
 
 class TestDirectoryStructure(unittest.TestCase):
@@ -17,7 +30,9 @@ class TestDirectoryStructure(unittest.TestCase):
     
     def setUp(self):
         """Set up test fixtures."""
-        self.test_dir = tempfile.mkdtemp()
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.test_dir = self._tmp.name
         self.test_path = Path(self.test_dir)
         
         # Create a test config file
@@ -36,36 +51,25 @@ class TestDirectoryStructure(unittest.TestCase):
         with open(config_path, 'w') as f:
             json.dump(self.config, f)
             
-        # Change to test directory
-        self.original_cwd = os.getcwd()
+        # Change to test directory; the cleanup restores it even if a test
+        # fails, before the directory is removed
+        self.addCleanup(os.chdir, os.getcwd())
         os.chdir(self.test_path)
-        
-    def tearDown(self):
-        """Clean up test fixtures."""
-        os.chdir(self.original_cwd)
-        import shutil
-        shutil.rmtree(self.test_dir, ignore_errors=True)
     
-    @patch('claude_agent_environment.main.initialize_config')
-    @patch('claude_agent_environment.main.subprocess.run')
-    @patch('claude_agent_environment.main.check_repo_exists')
-    @patch('claude_agent_environment.main.clone_or_update_repo')
+    @with_std_mocks
     @patch('sys.argv', ['cae', 'test-branch', 'frontend', 'backend'])
-    def test_branch_directory_created_in_cwd(self, mock_clone, mock_check_exists, mock_subprocess, mock_init_config):
+    def test_branch_directory_created_in_cwd(self, mock_clone, mock_check_exists, mock_execvp, mock_init_config):
         """Test that branch directory is created in current working directory."""
         # Set up mock config
         mock_init_config.return_value = None
-        import claude_agent_environment.main as main_module
-        main_module.CONFIG = self.config
-        main_module.REPO_MAPPING = {name: repo['url'] for name, repo in self.config['repositories'].items()}
-        main_module.REPO_CONFIGS = self.config['repositories']
+        initialize_config(self.config)
         
         # All repos exist and clone successfully
         mock_check_exists.return_value = True
         mock_clone.return_value = True
         
-        # Mock Claude CLI not found
-        mock_subprocess.side_effect = FileNotFoundError()
+        # Mock Claude CLI failing to launch
+        mock_execvp.side_effect = FileNotFoundError()
         
         result = main()
         
@@ -81,26 +85,20 @@ class TestDirectoryStructure(unittest.TestCase):
         claude_file = expected_dir / "CLAUDE.md"
         self.assertTrue(claude_file.exists())
     
-    @patch('claude_agent_environment.main.initialize_config')
-    @patch('claude_agent_environment.main.subprocess.run')
-    @patch('claude_agent_environment.main.check_repo_exists')
-    @patch('claude_agent_environment.main.clone_or_update_repo')
+    @with_std_mocks
     @patch('sys.argv', ['cae', 'feature/new-feature', 'frontend'])
-    def test_slash_in_branch_name_converted(self, mock_clone, mock_check_exists, mock_subprocess, mock_init_config):
+    def test_slash_in_branch_name_converted(self, mock_clone, mock_check_exists, mock_execvp, mock_init_config):
         """Test that slashes in branch names are converted to hyphens for directory names."""
         # Set up mock config
         mock_init_config.return_value = None
-        import claude_agent_environment.main as main_module
-        main_module.CONFIG = self.config
-        main_module.REPO_MAPPING = {name: repo['url'] for name, repo in self.config['repositories'].items()}
-        main_module.REPO_CONFIGS = self.config['repositories']
+        initialize_config(self.config)
         
         # Repo exists and clones successfully
         mock_check_exists.return_value = True
         mock_clone.return_value = True
         
-        # Mock Claude CLI not found
-        mock_subprocess.side_effect = FileNotFoundError()
+        # Mock Claude CLI failing to launch
+        mock_execvp.side_effect = FileNotFoundError()
         
         result = main()
         
@@ -116,26 +114,20 @@ class TestDirectoryStructure(unittest.TestCase):
         invalid_dir = self.test_path / "feature/new-feature"
         self.assertFalse(invalid_dir.exists())
     
-    @patch('claude_agent_environment.main.initialize_config')
-    @patch('claude_agent_environment.main.subprocess.run')
-    @patch('claude_agent_environment.main.check_repo_exists')
-    @patch('claude_agent_environment.main.clone_or_update_repo')
+    @with_std_mocks
     @patch('sys.argv', ['cae', 'test-branch', 'frontend', 'backend'])
-    def test_repositories_cloned_to_branch_directory(self, mock_clone, mock_check_exists, mock_subprocess, mock_init_config):
+    def test_repositories_cloned_to_branch_directory(self, mock_clone, mock_check_exists, mock_execvp, mock_init_config):
         """Test that repositories are cloned into the branch directory, not cwd."""
         # Set up mock config
         mock_init_config.return_value = None
-        import claude_agent_environment.main as main_module
-        main_module.CONFIG = self.config
-        main_module.REPO_MAPPING = {name: repo['url'] for name, repo in self.config['repositories'].items()}
-        main_module.REPO_CONFIGS = self.config['repositories']
+        initialize_config(self.config)
         
         # All repos exist
         mock_check_exists.return_value = True
         mock_clone.return_value = True
         
-        # Mock Claude CLI not found
-        mock_subprocess.side_effect = FileNotFoundError()
+        # Mock Claude CLI failing to launch
+        mock_execvp.side_effect = FileNotFoundError()
         
         result = main()
         
@@ -147,38 +139,63 @@ class TestDirectoryStructure(unittest.TestCase):
         expected_base_dir = (self.test_path / "test-branch").resolve()
         
         # Check that both repos were cloned to the branch directory
+        # (repos are set up concurrently, so call order is not guaranteed)
         calls = mock_clone.call_args_list
         self.assertEqual(len(calls), 2)
+
+        self.assertEqual(
+            {c[0][:3] for c in calls},
+            {
+                ("frontend", "https://github.com/TestOrg/frontend", "test-branch"),
+                ("backend", "https://github.com/TestOrg/backend", "test-branch"),
+            }
+        )
+        for c in calls:
+            self.assertEqual(c[0][3].resolve(), expected_base_dir)  # base_dir
+    
+    @with_std_mocks
+    @patch('sys.argv', ['cae', 'test-branch', 'frontend', 'backend'])
+    def test_repositories_set_up_concurrently(self, mock_clone, mock_check_exists, mock_execvp, mock_init_config):
+        """Test that repositories are set up in parallel rather than one by one."""
+        # Set up mock config
+        mock_init_config.return_value = None
+        initialize_config(self.config)
+        
+        mock_check_exists.return_value = True
+        mock_execvp.side_effect = FileNotFoundError()
+        
+        # Each setup waits for the other; sequential setup would break the barrier
+        barrier = threading.Barrier(2, timeout=5)
+        
+        def mock_setup(*args):
+            barrier.wait()
+            return True
         
-        # First repo
-        self.assertEqual(calls[0][0][0], "frontend")  # repo name
-        self.assertEqual(calls[0][0][3].resolve(), expected_base_dir)  # base_dir
+        mock_clone.side_effect = mock_setup
         
-        # Second repo
-        self.assertEqual(calls[1][0][0], "backend")  # repo name
-        self.assertEqual(calls[1][0][3].resolve(), expected_base_dir)  # base_dir
+        result = main()
+        
+        self.assertEqual(result, 0)
+        self.assertEqual(mock_clone.call_count, 2)
     
-    @patch('claude_agent_environment.main.initialize_config')
-    @patch('claude_agent_environment.main.subprocess.run')
-    @patch('claude_agent_environment.main.check_repo_exists')
-    @patch('claude_agent_environment.main.clone_or_update_repo')
+    @with_std_mocks
     @patch('claude_agent_environment.main.os.chdir')
+    @patch('claude_agent_environment.main.shutil.which', return_value='/usr/bin/claude')
     @patch('sys.argv', ['cae', 'test-branch', 'frontend'])
-    def test_changes_to_branch_directory_before_launching_claude(self, mock_chdir, mock_clone, mock_check_exists, mock_subprocess, mock_init_config):
+    def test_changes_to_branch_directory_before_launching_claude(self, mock_which, mock_chdir, mock_clone, mock_check_exists, mock_execvp, mock_init_config):
         """Test that the script changes to the branch directory before launching Claude."""
         # Set up mock config
         mock_init_config.return_value = None
-        import claude_agent_environment.main as main_module
-        main_module.CONFIG = self.config
-        main_module.REPO_MAPPING = {name: repo['url'] for name, repo in self.config['repositories'].items()}
-        main_module.REPO_CONFIGS = self.config['repositories']
+        initialize_config(self.config)
         
         # Repo exists and clones successfully
         mock_check_exists.return_value = True
         mock_clone.return_value = True
         
-        # Mock Claude CLI found and runs
-        mock_subprocess.return_value = MagicMock(returncode=0)
+        # Track the order of chdir and launching Claude
+        events = []
+        mock_chdir.side_effect = lambda path: events.append('chdir')
+        mock_execvp.side_effect = lambda *args: events.append('exec')
         
         result = main()
         
@@ -190,20 +207,58 @@ class TestDirectoryStructure(unittest.TestCase):
         expected_dir = (self.test_path / "test-branch").resolve()
         actual_call = mock_chdir.call_args[0][0].resolve() if mock_chdir.called else None
         self.assertEqual(actual_call, expected_dir)
+        
+        # Claude replaces the current process once in the branch directory
+        mock_execvp.assert_called_once_with('/usr/bin/claude', ['/usr/bin/claude'])
+        self.assertEqual(events, ['chdir', 'exec'])
+    
+    @with_std_mocks
+    @patch('claude_agent_environment.main.os.chdir')
+    @patch('claude_agent_environment.main.shutil.which', return_value='/usr/bin/claude')
+    @patch('claude_agent_environment.version_check.start_background_update_check')
+    @patch('sys.argv', ['cae', 'test-branch', 'frontend'])
+    def test_update_check_joined_before_launching_claude(self, mock_update_check, mock_which, mock_chdir, mock_clone, mock_check_exists, mock_execvp, mock_init_config):
+        """Test that a running update check gets a moment to finish before exec replaces the process."""
+        mock_init_config.return_value = None
+        initialize_config(self.config)
+        
+        mock_check_exists.return_value = True
+        mock_clone.return_value = True
+        
+        events = []
+        update_thread = mock_update_check.return_value
+        update_thread.join.side_effect = lambda timeout: events.append(('join', timeout))
+        mock_execvp.side_effect = lambda *args: events.append('exec')
+        
+        self.assertEqual(main(), 0)
+        self.assertEqual(events, [('join', UPDATE_CHECK_GRACE), 'exec'])
+    
+    @with_std_mocks
+    @patch('sys.argv', ['cae', 'test-branch', 'frontend', 'backend', 'frontend'])
+    def test_duplicate_repositories_set_up_once(self, mock_clone, mock_check_exists, mock_execvp, mock_init_config):
+        """Test that a repository listed twice is only set up once."""
+        mock_init_config.return_value = None
+        initialize_config(self.config)
+        
+        mock_check_exists.return_value = True
+        mock_clone.return_value = True
+        mock_execvp.side_effect = FileNotFoundError()
+        
+        result = main()
+        
+        self.assertEqual(result, 0)
+        self.assertEqual(
+            sorted(c[0][0] for c in mock_clone.call_args_list),
+            ["backend", "frontend"]
+        )
     
-    @patch('claude_agent_environment.main.initialize_config')
-    @patch('claude_agent_environment.main.subprocess.run')
-    @patch('claude_agent_environment.main.check_repo_exists')
-    @patch('claude_agent_environment.main.clone_or_update_repo')
+    @with_std_mocks
     @patch('sys.argv', ['cae', 'existing-branch', 'frontend'])
-    def test_existing_branch_directory_reused(self, mock_clone, mock_check_exists, mock_subprocess, mock_init_config):
+    def test_existing_branch_directory_reused(self, mock_clone, mock_check_exists, mock_execvp, mock_init_config):
         """Test that existing branch directories are reused, not recreated."""
         # Set up mock config
         mock_init_config.return_value = None
-        import claude_agent_environment.main as main_module
-        main_module.CONFIG = self.config
-        main_module.REPO_MAPPING = {name: repo['url'] for name, repo in self.config['repositories'].items()}
-        main_module.REPO_CONFIGS = self.config['repositories']
+        initialize_config(self.config)
         
         # Create existing branch directory with a test file
         branch_dir = self.test_path / "existing-branch"
@@ -215,8 +270,8 @@ class TestDirectoryStructure(unittest.TestCase):
         mock_check_exists.return_value = True
         mock_clone.return_value = True
         
-        # Mock Claude CLI not found
-        mock_subprocess.side_effect = FileNotFoundError()
+        # Mock Claude CLI failing to launch
+        mock_execvp.side_effect = FileNotFoundError()
         
         result = main()
         
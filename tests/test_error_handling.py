@@ -1,221 +1,204 @@
 """Unit tests for error handling and user interaction."""
 
+import contextlib
+import io
 import unittest
-from unittest.mock import patch, MagicMock, call
+from unittest.mock import patch, call
 import tempfile
 import json
 from pathlib import Path
+from types import MappingProxyType, SimpleNamespace
 import sys
-import os
 import argparse
 
-from claude_agent_environment.main import main, initialize_config
+import pytest
+from unittest_parametrize import ParametrizedTestCase, parametrize
 
+import claude_agent_environment
+import claude_agent_environment.main as main_module
+from claude_agent_environment.main import (
+    RepoRegistry,
+    _ticket_pattern,
+    extract_ticket_id,
+    find_claude_cli,
+    get_org_from_repos,
+    initialize_config,
+    launch_claude,
+    main,
+)
 
-class TestErrorHandling(unittest.TestCase):
+
+TEMPLATE_PATH = Path(claude_agent_environment.__file__).parent / "claude_template.md"
+# Module globals set by initialize_config
+CONFIG_GLOBALS = ("CONFIG", "REGISTRY", "ORG_NAME", "GITHUB_BASE_URL")
+# Read-only config shared by every error handling test; every level is a
+# mapping proxy, so neither the config nor its repositories can be modified
+_FAKE_CONFIG = MappingProxyType({
+    "repositories": MappingProxyType({
+        "ios": MappingProxyType({
+            "url": "https://github.com/TestOrg/ios"
+        }),
+        "backend": MappingProxyType({
+            "url": "https://github.com/TestOrg/backend"
+        })
+    })
+})
+
+
+def _patch_config_globals(config_globals):
+    """Patch main's config globals to the given values, restoring them on exit."""
+    return patch.multiple(main_module, **config_globals)
+
+
+@pytest.fixture(scope="class")
+def config_globals():
+    """Derive the config globals from the shared test config once per class."""
+    # Snapshot the current globals so initialize_config's writes are undone
+    with _patch_config_globals({name: getattr(main_module, name) for name in CONFIG_GLOBALS}):
+        initialize_config(_FAKE_CONFIG)
+        return {name: getattr(main_module, name) for name in CONFIG_GLOBALS}
+
+
+class TestErrorHandling:
     """Test error handling and user interaction flows."""
     
-    def setUp(self):
-        """Set up test fixtures."""
-        self.test_dir = tempfile.mkdtemp()
-        self.test_path = Path(self.test_dir)
+    @pytest.fixture(autouse=True)
+    def std_mocks(self, config_globals, fs):
+        """Install the config globals, an in-memory workspace and main's mocks for one test."""
         
-        # Create a test config file
-        self.config = {
-            "repositories": {
-                "ios": {
-                    "url": "https://github.com/TestOrg/ios"
-                },
-                "backend": {
-                    "url": "https://github.com/TestOrg/backend"
-                }
-            }
-        }
+        # Run against an in-memory filesystem, keeping the packaged template readable.
+        # main() lays out the branch directory under the current directory; the fake
+        # filesystem starts out in its root, so that serves as the workspace without
+        # changing directory
+        fs.add_real_file(TEMPLATE_PATH)
+        self.test_path = Path.cwd()
         
-        config_path = self.test_path / "cae_config.json"
-        with open(config_path, 'w') as f:
-            json.dump(self.config, f)
+        # Create a test config file
+        with open(self.test_path / "cae_config.json", 'w') as f:
+            json.dump(_FAKE_CONFIG, f, default=dict)
+        
+        with contextlib.ExitStack() as stack:
+            # Install the prebuilt config globals (initialize_config itself is
+            # patched below so main() doesn't reload them)
+            stack.enter_context(_patch_config_globals(config_globals))
+            self.mock_init_config = stack.enter_context(patch('claude_agent_environment.main.initialize_config'))
+            self.mock_check_exists = stack.enter_context(patch('claude_agent_environment.main.check_repo_exists'))
+            self.mock_clone = stack.enter_context(patch('claude_agent_environment.main.clone_or_update_repo'))
+            self.mock_input = stack.enter_context(patch('claude_agent_environment.main.input'))
+            self.mock_execvp = stack.enter_context(patch('claude_agent_environment.main.os.execvp'))
             
-        # Change to test directory
-        self.original_cwd = os.getcwd()
-        os.chdir(self.test_path)
-        
-    def tearDown(self):
-        """Clean up test fixtures."""
-        os.chdir(self.original_cwd)
-        import shutil
-        shutil.rmtree(self.test_dir, ignore_errors=True)
+            # Repos clone successfully and the Claude CLI fails to launch unless
+            # a test says otherwise
+            self.mock_clone.return_value = True
+            self.mock_execvp.side_effect = FileNotFoundError()
+            
+            yield
     
-    @patch('claude_agent_environment.main.initialize_config')
-    @patch('claude_agent_environment.main.subprocess.run')
-    @patch('claude_agent_environment.main.check_repo_exists')
-    @patch('claude_agent_environment.main.input')
-    @patch('sys.argv', ['cae', 'test-branch', 'ios', 'nonexistent', 'backend'])
-    def test_invalid_repo_interactive_continue(self, mock_input, mock_check_exists, mock_subprocess, mock_init_config):
+    def test_invalid_repo_interactive_continue(self, monkeypatch):
         """Test interactive prompt when invalid repo is found - user continues."""
-        # Set up mock config
-        mock_init_config.return_value = None
-        import claude_agent_environment.main as main_module
-        main_module.CONFIG = self.config
-        main_module.REPO_MAPPING = {name: repo['url'] for name, repo in self.config['repositories'].items()}
-        main_module.REPO_CONFIGS = self.config['repositories']
+        monkeypatch.setattr(sys, 'argv', ['cae', 'test-branch', 'ios', 'nonexistent', 'backend'])
         
         # Mock repo existence checks
-        mock_check_exists.side_effect = lambda url: 'nonexistent' not in url
+        self.mock_check_exists.side_effect = lambda url: 'nonexistent' not in url
         
         # User chooses to continue
-        mock_input.return_value = 'y'
+        self.mock_input.return_value = 'y'
         
-        # Mock subprocess for git operations
-        mock_subprocess.return_value = MagicMock(
-            returncode=0,
-            stdout="",
-            stderr="",
-            check=True
-        )
-        
-        with patch('claude_agent_environment.main.clone_or_update_repo', return_value=True):
-            result = main()
+        result = main()
         
         # Should continue with valid repos
-        self.assertEqual(result, 0)
-        mock_input.assert_called_once()
+        assert result == 0
+        self.mock_input.assert_called_once()
     
-    @patch('claude_agent_environment.main.initialize_config')
-    @patch('claude_agent_environment.main.subprocess.run')
-    @patch('claude_agent_environment.main.check_repo_exists')
-    @patch('claude_agent_environment.main.input')
-    @patch('sys.argv', ['cae', 'test-branch', 'ios', 'nonexistent', 'backend'])
-    def test_invalid_repo_interactive_abort(self, mock_input, mock_check_exists, mock_subprocess, mock_init_config):
+    def test_invalid_repo_interactive_abort(self, monkeypatch):
         """Test interactive prompt when invalid repo is found - user aborts."""
-        # Set up mock config
-        mock_init_config.return_value = None
-        import claude_agent_environment.main as main_module
-        main_module.CONFIG = self.config
-        main_module.REPO_MAPPING = {name: repo['url'] for name, repo in self.config['repositories'].items()}
-        main_module.REPO_CONFIGS = self.config['repositories']
+        monkeypatch.setattr(sys, 'argv', ['cae', 'test-branch', 'ios', 'nonexistent', 'backend'])
         
         # Mock repo existence checks
-        mock_check_exists.side_effect = lambda url: 'nonexistent' not in url
+        self.mock_check_exists.side_effect = lambda url: 'nonexistent' not in url
         
         # User chooses NOT to continue
-        mock_input.return_value = 'n'
+        self.mock_input.return_value = 'n'
         
         result = main()
         
         # Should exit with error
-        self.assertEqual(result, 1)
-        mock_input.assert_called_once()
+        assert result == 1
+        self.mock_input.assert_called_once()
     
-    @patch('claude_agent_environment.main.initialize_config')
-    @patch('claude_agent_environment.main.subprocess.run')
-    @patch('claude_agent_environment.main.check_repo_exists')
-    @patch('sys.argv', ['cae', 'test-branch', 'ios', 'nonexistent', '--continue-on-error'])
-    def test_invalid_repo_continue_on_error_flag(self, mock_check_exists, mock_subprocess, mock_init_config):
+    def test_invalid_repo_continue_on_error_flag(self, monkeypatch):
         """Test --continue-on-error flag bypasses interactive prompt."""
-        # Set up mock config
-        mock_init_config.return_value = None
-        import claude_agent_environment.main as main_module
-        main_module.CONFIG = self.config
-        main_module.REPO_MAPPING = {name: repo['url'] for name, repo in self.config['repositories'].items()}
-        main_module.REPO_CONFIGS = self.config['repositories']
+        monkeypatch.setattr(sys, 'argv', ['cae', 'test-branch', 'ios', 'nonexistent', '--continue-on-error'])
         
         # Mock repo existence checks
-        mock_check_exists.side_effect = lambda url: 'nonexistent' not in url
-        
-        # Mock subprocess for git operations
-        mock_subprocess.return_value = MagicMock(
-            returncode=0,
-            stdout="",
-            stderr="",
-            check=True
-        )
+        self.mock_check_exists.side_effect = lambda url: 'nonexistent' not in url
         
-        with patch('claude_agent_environment.main.clone_or_update_repo', return_value=True):
-            with patch('claude_agent_environment.main.input') as mock_input:
-                result = main()
+        result = main()
         
         # Should not prompt user
-        mock_input.assert_not_called()
+        self.mock_input.assert_not_called()
         # Should succeed with valid repos only
-        self.assertEqual(result, 0)
+        assert result == 0
     
-    @patch('claude_agent_environment.main.initialize_config')
-    @patch('claude_agent_environment.main.check_repo_exists')
-    @patch('sys.argv', ['cae', 'test-branch', 'nonexistent1', 'nonexistent2'])
-    def test_all_repos_invalid(self, mock_check_exists, mock_init_config):
+    def test_existing_checkout_skips_validation(self, monkeypatch):
+        """Test that unlisted repos already cloned in the branch directory aren't re-validated."""
+        monkeypatch.setattr(sys, 'argv', ['cae', 'test-branch', 'ios', 'unlisted'])
+        
+        # Simulate a previous checkout of the unlisted repo
+        (self.test_path / "test-branch" / "unlisted").mkdir(parents=True)
+
+        result = main()
+
+        assert result == 0
+        self.mock_check_exists.assert_not_called()
+
+    def test_all_repos_invalid(self, monkeypatch):
         """Test when all repositories are invalid."""
-        # Set up mock config
-        mock_init_config.return_value = None
-        import claude_agent_environment.main as main_module
-        main_module.CONFIG = self.config
-        main_module.REPO_MAPPING = {name: repo['url'] for name, repo in self.config['repositories'].items()}
-        main_module.REPO_CONFIGS = self.config['repositories']
+        monkeypatch.setattr(sys, 'argv', ['cae', 'test-branch', 'nonexistent1', 'nonexistent2'])
         
         # All repos are invalid
-        mock_check_exists.return_value = False
+        self.mock_check_exists.return_value = False
         
         result = main()
         
         # Should exit with error
-        self.assertEqual(result, 1)
+        assert result == 1
     
-    @patch('claude_agent_environment.main.initialize_config')
-    @patch('claude_agent_environment.main.clone_or_update_repo')
-    @patch('claude_agent_environment.main.check_repo_exists')
-    @patch('sys.argv', ['cae', 'test-branch', 'ios', 'backend'])
-    def test_partial_setup_failure(self, mock_check_exists, mock_clone, mock_init_config):
+    def test_partial_setup_failure(self, monkeypatch):
         """Test when some repos succeed and others fail during setup."""
-        # Set up mock config
-        mock_init_config.return_value = None
-        import claude_agent_environment.main as main_module
-        main_module.CONFIG = self.config
-        main_module.REPO_MAPPING = {name: repo['url'] for name, repo in self.config['repositories'].items()}
-        main_module.REPO_CONFIGS = self.config['repositories']
+        monkeypatch.setattr(sys, 'argv', ['cae', 'test-branch', 'ios', 'backend'])
         
         # All repos exist
-        mock_check_exists.return_value = True
+        self.mock_check_exists.return_value = True
         
         # First repo succeeds, second fails
-        mock_clone.side_effect = [True, False]
+        self.mock_clone.side_effect = [True, False]
         
         result = main()
         
         # Should exit with warning
-        self.assertEqual(result, 1)
+        assert result == 1
     
-    @patch('claude_agent_environment.main.initialize_config')
-    @patch('claude_agent_environment.main.clone_or_update_repo')
-    @patch('claude_agent_environment.main.check_repo_exists')
-    @patch('claude_agent_environment.main.subprocess.run')
-    @patch('sys.argv', ['cae', 'test-branch', 'ios'])
-    def test_successful_setup(self, mock_subprocess, mock_check_exists, mock_clone, mock_init_config):
+    def test_successful_setup(self, monkeypatch):
         """Test successful repository setup."""
-        # Set up mock config
-        mock_init_config.return_value = None
-        import claude_agent_environment.main as main_module
-        main_module.CONFIG = self.config
-        main_module.REPO_MAPPING = {name: repo['url'] for name, repo in self.config['repositories'].items()}
-        main_module.REPO_CONFIGS = self.config['repositories']
+        monkeypatch.setattr(sys, 'argv', ['cae', 'test-branch', 'ios'])
         
         # Repo exists
-        mock_check_exists.return_value = True
+        self.mock_check_exists.return_value = True
         
         # Clone succeeds
-        mock_clone.return_value = True
+        self.mock_clone.return_value = True
         
-        # Mock Claude CLI check
-        mock_subprocess.side_effect = [
-            MagicMock(returncode=1)  # Claude not found
-        ]
+        # Mock Claude CLI failing to launch
+        self.mock_execvp.side_effect = FileNotFoundError()
         
         result = main()
         
         # Should succeed
-        self.assertEqual(result, 0)
+        assert result == 0
 
 
-class TestUtilityFunctions(unittest.TestCase):
+class TestUtilityFunctions(ParametrizedTestCase):
     """Test utility functions."""
     
     @patch('claude_agent_environment.main.CONFIG', {
@@ -226,8 +209,6 @@ class TestUtilityFunctions(unittest.TestCase):
     })
     def test_get_org_from_repos(self):
         """Test extracting organization from repository URLs."""
-        from claude_agent_environment.main import get_org_from_repos
-        
         repos = {
             'repo1': {'url': 'https://github.com/TestOrg/repo1'},
             'repo2': {'url': 'https://github.com/TestOrg/repo2'}
@@ -236,24 +217,125 @@ class TestUtilityFunctions(unittest.TestCase):
         org = get_org_from_repos(repos)
         self.assertEqual(org, 'TestOrg')
     
-    def test_extract_ticket_id(self):
+    @patch('claude_agent_environment.main.shutil.which', return_value='/opt/bin/claude')
+    def test_find_claude_cli_in_path(self, mock_which):
+        """Test that Claude CLI is found in PATH first."""
+        self.assertEqual(find_claude_cli(), '/opt/bin/claude')
+
+    @patch('claude_agent_environment.main.shutil.which', return_value=None)
+    def test_find_claude_cli_fallback_locations(self, mock_which):
+        """Test falling back to known install locations, skipping non-executables."""
+        with tempfile.TemporaryDirectory() as tmp:
+            not_executable = Path(tmp) / "not-executable"
+            not_executable.write_text("")
+            claude = Path(tmp) / "claude"
+            claude.write_text("#!/bin/sh\n")
+            claude.chmod(0o755)
+
+            with patch('claude_agent_environment.main.CLAUDE_CLI_PATHS', [str(not_executable), str(claude)]):
+                self.assertEqual(find_claude_cli(), str(claude))
+
+            with patch('claude_agent_environment.main.CLAUDE_CLI_PATHS', [str(not_executable)]):
+                self.assertIsNone(find_claude_cli())
+
+    @patch('claude_agent_environment.main.os.name', 'posix')
+    @patch('claude_agent_environment.main.subprocess.run')
+    @patch('claude_agent_environment.main.os.execvp')
+    def test_launch_claude_replaces_process_on_posix(self, mock_execvp, mock_run):
+        """Test that Claude replaces this process on POSIX."""
+        launch_claude('/usr/bin/claude')
+
+        mock_execvp.assert_called_once_with('/usr/bin/claude', ['/usr/bin/claude'])
+        mock_run.assert_not_called()
+
+    @patch('claude_agent_environment.main.os.name', 'nt')
+    @patch('claude_agent_environment.main.subprocess.run')
+    @patch('claude_agent_environment.main.os.execvp')
+    def test_launch_claude_waits_for_child_on_windows(self, mock_execvp, mock_run):
+        """Test that Claude runs as a child on Windows and its exit code is returned."""
+        mock_run.return_value = SimpleNamespace(returncode=3)
+
+        self.assertEqual(launch_claude('C:\\claude.exe'), 3)
+        mock_run.assert_called_once_with(['C:\\claude.exe'])
+        mock_execvp.assert_not_called()
+
+    @patch('claude_agent_environment.main.os.name', 'nt')
+    @patch('claude_agent_environment.main.subprocess.run', side_effect=FileNotFoundError())
+    def test_launch_claude_reports_failure_to_start(self, mock_run):
+        """Test that a Claude CLI that can't be started is reported as None."""
+        self.assertIsNone(launch_claude('C:\\claude.exe'))
+
+    def test_initialize_config_derives_github_base_url(self):
+        """Test that the organization and base URL are computed once at init."""
+        initialize_config({
+            'repositories': {
+                'repo1': {'url': 'https://github.com/TestOrg/repo1'}
+            }
+        })
+
+        self.assertEqual(main_module.ORG_NAME, 'TestOrg')
+        self.assertEqual(main_module.GITHUB_BASE_URL, 'https://github.com/TestOrg')
+        self.assertEqual(main_module.REGISTRY.mapping, {'repo1': 'https://github.com/TestOrg/repo1'})
+
+    @parametrize("fetch_ttl", [("600",), (None,), (-1,), (True,)])
+    def test_initialize_config_rejects_invalid_fetch_ttl(self, fetch_ttl):
+        """Test that a fetch_ttl that isn't a number of seconds is reported as a config error."""
+        with patch('sys.stdout', new_callable=io.StringIO) as mock_stdout:
+            with self.assertRaises(SystemExit) as cm:
+                initialize_config({
+                    'repositories': {
+                        'repo1': {'url': 'https://github.com/TestOrg/repo1'}
+                    },
+                    'fetch_ttl': fetch_ttl
+                })
+
+        self.assertEqual(cm.exception.code, 1)
+        self.assertIn("Invalid fetch_ttl", mock_stdout.getvalue())
+
+    def test_initialize_config_accepts_fetch_ttl(self):
+        """Test that a numeric fetch_ttl is accepted."""
+        initialize_config({
+            'repositories': {
+                'repo1': {'url': 'https://github.com/TestOrg/repo1'}
+            },
+            'fetch_ttl': 600
+        })
+
+        self.assertEqual(main_module.CONFIG['fetch_ttl'], 600)
+
+    def test_registry_mapping_computed_once(self):
+        """Test that the repository URL mapping is derived from configs and memoized."""
+        registry = RepoRegistry({'repo1': {'url': 'https://github.com/TestOrg/repo1', 'test': 'pytest'}})
+
+        self.assertEqual(registry.mapping, {'repo1': 'https://github.com/TestOrg/repo1'})
+        self.assertIs(registry.mapping, registry.mapping)
+
+    # Test various branch name formats
+    @parametrize("branch_name,expected", [
+        ('eng-346-implement-feature', 'ENG-346'),
+        ('kgn/eng-348-security-review', 'ENG-348'),
+        ('feature/des-100-design', 'DES-100'),
+        ('ENG-500', 'ENG-500'),
+        ('fix/bugfix-ops-7-timeout', 'OPS-7'),
+        ('eng-12a-typo', None),
+        ('feature-branch', None),
+        ('main', None),
+    ])
+    @patch('claude_agent_environment.main.CONFIG', {'ticket_prefixes': ['eng', 'des', 'ops']})
+    def test_extract_ticket_id(self, branch_name, expected):
         """Test extracting Linear ticket ID from branch names."""
-        from claude_agent_environment.main import extract_ticket_id
-        
-        # Test various branch name formats
-        test_cases = [
-            ('eng-346-implement-feature', 'ENG-346'),
-            ('kgn/eng-348-security-review', 'ENG-348'),
-            ('feature/des-100-design', 'DES-100'),
-            ('ENG-500', 'ENG-500'),
-            ('feature-branch', None),
-            ('main', None),
-        ]
-        
-        with patch('claude_agent_environment.main.CONFIG', {'ticket_prefixes': ['eng', 'des', 'ops']}):
-            for branch_name, expected in test_cases:
-                result = extract_ticket_id(branch_name)
-                self.assertEqual(result, expected, f"Failed for branch: {branch_name}")
+        self.assertEqual(extract_ticket_id(branch_name), expected)
+
+    @patch('claude_agent_environment.main.CONFIG', {'ticket_prefixes': ['eng', 'des', 'ops']})
+    def test_ticket_pattern_compiled_once_per_prefixes(self):
+        """Test that the ticket ID pattern is reused while the prefixes are unchanged."""
+        extract_ticket_id('eng-346-implement-feature')
+        before = _ticket_pattern.cache_info()
+        extract_ticket_id('feature/des-100-design')
+        after = _ticket_pattern.cache_info()
+        
+        self.assertEqual(after.hits, before.hits + 1)
+        self.assertEqual(after.misses, before.misses)
 
 
 if __name__ == '__main__':
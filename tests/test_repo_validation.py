@@ -1,58 +1,106 @@
 """Unit tests for repository validation functionality."""
 
 import unittest
-from unittest.mock import patch, MagicMock
-import tempfile
+from types import SimpleNamespace
+from unittest.mock import patch
 import json
 from pathlib import Path
 import sys
 import os
 
-from claude_agent_environment.main import check_repo_exists, clone_or_update_repo, run_command
+from unittest_parametrize import ParametrizedTestCase, parametrize
 
+from tests.fakes import FakeGit
+from claude_agent_environment.main import RepoRegistry, check_repo_exists, clone_or_update_repo, run_command
 
-class TestRepoValidation(unittest.TestCase):
+
+class TestRepoValidation(ParametrizedTestCase):
     """Test repository validation and existence checking."""
     
     def setUp(self):
         """Set up test fixtures."""
-        self.test_dir = tempfile.mkdtemp()
-        self.test_path = Path(self.test_dir)
-        
-    def tearDown(self):
-        """Clean up test fixtures."""
-        import shutil
-        shutil.rmtree(self.test_dir, ignore_errors=True)
+        # Only passed through to mocked git commands; never created on disk
+        self.test_path = Path("/fake/tmp")
     
+    @parametrize("run_result,expected", [
+        ((True, "ref: refs/heads/main"), True),
+        ((False, "Repository not found"), False),
+    ])
     @patch('claude_agent_environment.main.run_command')
-    def test_check_repo_exists_valid(self, mock_run_command):
-        """Test checking if a valid repository exists."""
-        mock_run_command.return_value = (True, "ref: refs/heads/main")
+    def test_check_repo_exists(self, mock_run_command, run_result, expected):
+        """Test that a repository exists exactly when ls-remote succeeds."""
+        mock_run_command.return_value = run_result
         
         result = check_repo_exists("https://github.com/user/repo")
         
-        self.assertTrue(result)
+        self.assertIs(result, expected)
         mock_run_command.assert_called_once_with(
-            "git ls-remote https://github.com/user/repo HEAD"
+            ["git", "ls-remote", "https://github.com/user/repo", "HEAD"]
         )
     
-    @patch('claude_agent_environment.main.run_command')
-    def test_check_repo_exists_invalid(self, mock_run_command):
-        """Test checking if an invalid repository exists."""
-        mock_run_command.return_value = (False, "Repository not found")
+    @patch('claude_agent_environment.main.subprocess.run')
+    def test_run_command_argv_skips_shell(self, mock_subprocess):
+        """Test that argv lists are executed directly while strings use the shell."""
+        mock_subprocess.return_value = SimpleNamespace(returncode=0, stdout="output", stderr="")
         
-        result = check_repo_exists("https://github.com/user/nonexistent")
+        success, output = run_command(["git", "status"])
+        self.assertTrue(success)
+        self.assertEqual(output, "output")
+        self.assertFalse(mock_subprocess.call_args[1]['shell'])
         
-        self.assertFalse(result)
+        run_command("npm install && npm run build")
+        self.assertTrue(mock_subprocess.call_args[1]['shell'])
+    
+    @patch.dict(os.environ, {}, clear=True)
+    @patch('claude_agent_environment.main.os.name', 'posix')
+    @patch('claude_agent_environment.main.subprocess.run')
+    def test_run_command_multiplexes_ssh(self, mock_subprocess):
+        """Test that git commands share SSH connections via ControlMaster."""
+        run_command(["git", "fetch", "--all"])
+        
+        env = mock_subprocess.call_args[1]['env']
+        self.assertIn("ControlMaster=auto", env["GIT_SSH_COMMAND"])
+    
+    @patch.dict(os.environ, {"GIT_SSH_COMMAND": "ssh -i ~/.ssh/deploy_key"}, clear=True)
+    @patch('claude_agent_environment.main.subprocess.run')
+    def test_run_command_respects_user_ssh_command(self, mock_subprocess):
+        """Test that a user-provided GIT_SSH_COMMAND is left untouched."""
+        run_command(["git", "fetch", "--all"])
+        
+        env = mock_subprocess.call_args[1]['env']
+        self.assertEqual(env["GIT_SSH_COMMAND"], "ssh -i ~/.ssh/deploy_key")
+    
+    @patch('claude_agent_environment.main.subprocess.run')
+    def test_run_command_discards_stdout(self, mock_subprocess):
+        """Test that stdout can be discarded while stderr is still captured."""
+        import subprocess
+        mock_subprocess.return_value = SimpleNamespace(returncode=0, stdout=None, stderr="")
+        
+        success, output = run_command(["git", "fetch", "--all"], capture_stdout=False)
+        
+        self.assertTrue(success)
+        self.assertEqual(output, "")
+        self.assertEqual(mock_subprocess.call_args[1]['stdout'], subprocess.DEVNULL)
+        self.assertEqual(mock_subprocess.call_args[1]['stderr'], subprocess.PIPE)
+    
+    @patch('claude_agent_environment.main.subprocess.run')
+    def test_run_command_missing_executable(self, mock_subprocess):
+        """Test that a missing executable is reported as a failure."""
+        mock_subprocess.side_effect = FileNotFoundError("No such file or directory: 'git'")
+        
+        success, output = run_command(["git", "status"])
+        
+        self.assertFalse(success)
+        self.assertIn("git", output)
     
     @patch('claude_agent_environment.main.run_command')
-    @patch('claude_agent_environment.main.REPO_CONFIGS', {})
+    @patch('claude_agent_environment.main.REGISTRY', RepoRegistry({}))
     def test_clone_repo_not_found(self, mock_run_command):
         """Test cloning a repository that doesn't exist."""
         # Mock git clone failure with 404 error
-        mock_run_command.side_effect = [
-            (False, "ERROR: Repository not found.\nfatal: Could not read from remote repository.")
-        ]
+        mock_run_command.side_effect = FakeGit({
+            "git": (False, "ERROR: Repository not found.\nfatal: Could not read from remote repository."),
+        })
         
         result = clone_or_update_repo(
             "nonexistent", 
@@ -64,17 +112,19 @@ class TestRepoValidation(unittest.TestCase):
         self.assertFalse(result)
         # Verify git clone was attempted
         mock_run_command.assert_called_with(
-            f"git clone https://github.com/user/nonexistent {self.test_path / 'nonexistent'}"
+            ["git", "-c", "protocol.version=2", "clone", "--filter=blob:none", "--no-tags",
+             "https://github.com/user/nonexistent", str(self.test_path / 'nonexistent')],
+            capture_stdout=False
         )
     
     @patch('claude_agent_environment.main.run_command')
-    @patch('claude_agent_environment.main.REPO_CONFIGS', {})
+    @patch('claude_agent_environment.main.REGISTRY', RepoRegistry({}))
     def test_clone_repo_other_error(self, mock_run_command):
         """Test cloning a repository with non-404 error."""
         # Mock git clone failure with non-404 error
-        mock_run_command.side_effect = [
-            (False, "fatal: Authentication failed")
-        ]
+        mock_run_command.side_effect = FakeGit({
+            "git": (False, "fatal: Authentication failed"),
+        })
         
         result = clone_or_update_repo(
             "private-repo",
@@ -86,16 +136,15 @@ class TestRepoValidation(unittest.TestCase):
         self.assertFalse(result)
     
     @patch('claude_agent_environment.main.run_command')
-    @patch('claude_agent_environment.main.REPO_MAPPING', {'configured-repo': 'https://github.com/org/configured'})
-    @patch('claude_agent_environment.main.REPO_CONFIGS', {})
+    @patch('claude_agent_environment.main.REGISTRY', RepoRegistry({'configured-repo': {'url': 'https://github.com/org/configured'}}))
     def test_clone_configured_repo_message(self, mock_run_command):
         """Test that configured repos don't show 'not in config' message."""
         # Mock git clone failure with 404 error for a non-configured repo
-        mock_run_command.side_effect = [
-            (False, "ERROR: Repository not found")
-        ]
+        mock_run_command.side_effect = FakeGit({
+            "git": (False, "ERROR: Repository not found"),
+        })
         
-        # This repo is NOT in REPO_MAPPING, so should show the note
+        # This repo is NOT in the registry's mapping, so should show the note
         result = clone_or_update_repo(
             "unconfigured-repo",
             "https://github.com/org/unconfigured",
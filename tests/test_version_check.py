@@ -1,41 +1,100 @@
 #!/usr/bin/env python3
 
 import json
+import subprocess
+import sys
+import time
+from pathlib import Path
 import pytest
-from unittest.mock import patch, MagicMock
-from urllib.error import URLError
+from unittest.mock import patch
+from urllib.error import HTTPError, URLError
 
 from claude_agent_environment.version_check import (
+    CACHE_TTL,
+    get_cache_path,
+    get_cached_version,
     get_current_version,
     get_latest_version,
     check_for_update,
-    display_update_notice
+    display_update_notice,
+    start_background_update_check
 )
 
 
+# GitHub release payload served by the mocked urlopen
+_FAKE_RELEASE_BYTES = json.dumps({"tag_name": "v2.0.0"}).encode()
+
+
+@pytest.fixture(autouse=True)
+def enable_update_check(monkeypatch):
+    """Re-enable the update check, which conftest disables for other tests."""
+    monkeypatch.delenv("CAE_SKIP_UPDATE_CHECK", raising=False)
+
+
+@pytest.fixture(scope="module")
+def urlopen_patch():
+    """Intercept urlopen for the whole module so no test can reach the network."""
+    with patch('urllib.request.urlopen') as mock_urlopen:
+        yield mock_urlopen
+
+
+@pytest.fixture(autouse=True)
+def mock_urlopen(urlopen_patch):
+    """Reset the shared urlopen mock to serve the fake release."""
+    urlopen_patch.reset_mock(return_value=True, side_effect=True)
+    mock_response = urlopen_patch.return_value.__enter__.return_value
+    mock_response.read.return_value = _FAKE_RELEASE_BYTES
+    mock_response.headers = {}
+    return urlopen_patch
+
+
+def write_cached_tag(tag, age, **validators):
+    """Write a cached latest version fetched age seconds ago."""
+    cache_path = get_cache_path()
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    cache_path.write_text(json.dumps({"tag": tag, "fetched_at": time.time() - age, **validators}))
+
+
+def test_import_skips_network_and_packaging_modules():
+    """Test that importing version_check doesn't pull in urllib or packaging."""
+    code = (
+        "import sys; import claude_agent_environment.version_check; "
+        "print(any(m in sys.modules for m in ('urllib.request', 'packaging.version')))"
+    )
+    repo_root = Path(__file__).resolve().parent.parent
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=repo_root, capture_output=True, text=True, check=True
+    )
+    assert result.stdout.strip() == "False"
+
+
 def test_get_current_version():
     """Test that we can get the current version."""
     version = get_current_version()
     assert version is not None
     assert isinstance(version, str)
     assert len(version) > 0
+    assert get_current_version() is version
+
 
+def test_get_current_version_fallback_reads_init_file(monkeypatch):
+    """Test reading the version from __init__.py when it can't be imported."""
+    import claude_agent_environment
+    expected = claude_agent_environment.__version__
+    monkeypatch.delattr(claude_agent_environment, "__version__")
+    get_current_version.cache_clear()
+    try:
+        assert get_current_version() == expected
+    finally:
+        get_current_version.cache_clear()
 
-@patch('claude_agent_environment.version_check.urlopen')
-def test_get_latest_version_success(mock_urlopen):
+
+def test_get_latest_version_success():
     """Test fetching latest version from GitHub."""
-    # Mock successful response
-    mock_response = MagicMock()
-    mock_response.read.return_value = json.dumps({
-        "tag_name": "v2.0.0"
-    }).encode('utf-8')
-    mock_urlopen.return_value.__enter__.return_value = mock_response
-    
     version = get_latest_version()
     assert version == "2.0.0"
 
 
-@patch('claude_agent_environment.version_check.urlopen')
 def test_get_latest_version_failure(mock_urlopen):
     """Test handling of network failures."""
     # Mock network error
@@ -45,6 +104,128 @@ def test_get_latest_version_failure(mock_urlopen):
     assert version is None
 
 
+def test_get_latest_version_cached(mock_urlopen):
+    """Test that the fetched version is cached and reused within the TTL."""
+    assert get_latest_version() == "2.0.0"
+    assert get_latest_version() == "2.0.0"
+    
+    assert mock_urlopen.call_count == 1
+    assert json.loads(get_cache_path().read_text())["tag"] == "2.0.0"
+
+
+def test_get_latest_version_cache_expired(mock_urlopen):
+    """Test that an expired cache entry is refreshed from GitHub."""
+    write_cached_tag("1.5.0", age=CACHE_TTL + 1)
+    
+    assert get_latest_version() == "2.0.0"
+    mock_urlopen.assert_called_once()
+
+
+def test_get_latest_version_not_modified(mock_urlopen):
+    """Test that a 304 response revalidates the cached tag."""
+    write_cached_tag("1.5.0", age=CACHE_TTL + 1, etag='"abc"', last_modified="Tue, 01 Sep 2026 00:00:00 GMT")
+    mock_urlopen.side_effect = HTTPError(None, 304, "Not Modified", {}, None)
+    
+    assert get_latest_version() == "1.5.0"
+    
+    request = mock_urlopen.call_args[0][0]
+    assert request.get_header("If-none-match") == '"abc"'
+    assert request.get_header("If-modified-since") == "Tue, 01 Sep 2026 00:00:00 GMT"
+    # The revalidated entry is fresh again
+    assert time.time() - json.loads(get_cache_path().read_text())["fetched_at"] < CACHE_TTL
+
+
+def test_get_latest_version_stores_validators(mock_urlopen):
+    """Test that the ETag and Last-Modified headers are cached with the tag."""
+    mock_response = mock_urlopen.return_value.__enter__.return_value
+    mock_response.headers = {"ETag": '"def"', "Last-Modified": "Wed, 02 Sep 2026 00:00:00 GMT"}
+    
+    assert get_latest_version() == "2.0.0"
+    
+    cached = json.loads(get_cache_path().read_text())
+    assert cached["etag"] == '"def"'
+    assert cached["last_modified"] == "Wed, 02 Sep 2026 00:00:00 GMT"
+
+
+def test_get_latest_version_skipped(mock_urlopen, monkeypatch):
+    """Test that CAE_SKIP_UPDATE_CHECK disables the lookup entirely."""
+    monkeypatch.setenv("CAE_SKIP_UPDATE_CHECK", "1")
+    write_cached_tag("2.0.0", age=0)
+    
+    assert get_latest_version() is None
+    mock_urlopen.assert_not_called()
+
+
+def test_get_cached_version_offline(mock_urlopen):
+    """Test that the cached version is returned however old it is, without the network."""
+    assert get_cached_version() is None
+    
+    write_cached_tag("2.0.0", age=CACHE_TTL * 10)
+    
+    assert get_cached_version() == "2.0.0"
+    mock_urlopen.assert_not_called()
+
+
+@patch('claude_agent_environment.version_check.get_latest_version')
+def test_background_update_check_refreshes_stale_cache(mock_latest):
+    """Test that a stale cache is refreshed in a daemon thread."""
+    write_cached_tag("1.5.0", age=CACHE_TTL + 1)
+    
+    thread = start_background_update_check()
+    thread.join()
+    
+    assert thread.daemon
+    mock_latest.assert_called_once()
+
+
+@pytest.mark.parametrize("error", [ConnectionResetError(), AttributeError()])
+def test_background_update_check_fails_silently(mock_urlopen, capsys, error):
+    """Test that errors escaping the lookup don't print a thread traceback."""
+    mock_urlopen.side_effect = error
+    
+    with patch('threading.excepthook') as mock_excepthook:
+        thread = start_background_update_check()
+        thread.join()
+    
+    mock_excepthook.assert_not_called()
+    assert capsys.readouterr().err == ""
+
+
+@pytest.mark.parametrize("fetched_at", [None, "yesterday", True])
+def test_malformed_cache_ignored(fetched_at):
+    """Test that a cache entry without a numeric fetch time is treated as missing."""
+    cache_path = get_cache_path()
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    cache_path.write_text(json.dumps({"tag": "1.5.0", "fetched_at": fetched_at}))
+    
+    thread = start_background_update_check()
+    thread.join()
+    
+    assert get_latest_version() == "2.0.0"
+
+
+@patch('claude_agent_environment.version_check.get_latest_version')
+def test_background_update_check_skips_fresh_cache(mock_latest):
+    """Test that no thread is started while the cache is fresh."""
+    write_cached_tag("2.0.0", age=0)
+    
+    assert start_background_update_check() is None
+    mock_latest.assert_not_called()
+
+
+@patch('claude_agent_environment.version_check.get_current_version')
+@patch('claude_agent_environment.version_check.get_latest_version')
+def test_check_for_update_cached_only(mock_latest, mock_current):
+    """Test that a cached-only check compares against the cache without fetching."""
+    mock_current.return_value = "1.0.0"
+    write_cached_tag("2.0.0", age=CACHE_TTL + 1)
+    
+    result = check_for_update(cached_only=True)
+    assert result["update_available"] is True
+    assert result["latest"] == "2.0.0"
+    mock_latest.assert_not_called()
+
+
 @patch('claude_agent_environment.version_check.get_current_version')
 @patch('claude_agent_environment.version_check.get_latest_version')
 def test_check_for_update_available(mock_latest, mock_current):
@@ -73,6 +254,22 @@ def test_check_for_update_not_available(mock_latest, mock_current):
     assert result["latest"] == "2.0.0"
 
 
+@pytest.mark.parametrize("current,latest,expected", [
+    ("1.0", "1.0.0", False),
+    ("1.9.0", "1.10.0", True),
+    ("2.0.0rc1", "2.0.0", True),
+    ("2.0.0", "2.0.0rc1", False),
+])
+@patch('claude_agent_environment.version_check.get_current_version')
+@patch('claude_agent_environment.version_check.get_latest_version')
+def test_check_for_update_version_ordering(mock_latest, mock_current, current, latest, expected):
+    """Test numeric comparison and the packaging fallback for pre-releases."""
+    mock_current.return_value = current
+    mock_latest.return_value = latest
+    
+    assert check_for_update()["update_available"] is expected
+
+
 @patch('claude_agent_environment.version_check.get_current_version')
 @patch('claude_agent_environment.version_check.get_latest_version')
 def test_check_for_update_network_failure(mock_latest, mock_current):
@@ -84,48 +281,23 @@ def test_check_for_update_network_failure(mock_latest, mock_current):
     assert result is None
 
 
+@pytest.mark.parametrize("check_result,expect_printed", [
+    ({"current": "1.0.0", "latest": "2.0.0", "update_available": True}, True),
+    ({"current": "2.0.0", "latest": "2.0.0", "update_available": False}, False),
+    (None, False),  # update check failed
+])
 @patch('claude_agent_environment.version_check.check_for_update')
 @patch('builtins.print')
-def test_display_update_notice_with_update(mock_print, mock_check):
-    """Test displaying update notice when update is available."""
-    mock_check.return_value = {
-        "current": "1.0.0",
-        "latest": "2.0.0",
-        "update_available": True
-    }
-    
-    display_update_notice()
-    
-    # Check that update notice was printed
-    calls = [str(call) for call in mock_print.call_args_list]
-    assert any("new version" in str(call).lower() for call in calls)
-    assert any("1.0.0" in str(call) for call in calls)
-    assert any("2.0.0" in str(call) for call in calls)
-
-
-@patch('claude_agent_environment.version_check.check_for_update')
-@patch('builtins.print')
-def test_display_update_notice_no_update(mock_print, mock_check):
-    """Test no notice when update is not available."""
-    mock_check.return_value = {
-        "current": "2.0.0",
-        "latest": "2.0.0",
-        "update_available": False
-    }
-    
-    display_update_notice()
-    
-    # Check that no update notice was printed
-    mock_print.assert_not_called()
-
-
-@patch('claude_agent_environment.version_check.check_for_update')
-@patch('builtins.print')
-def test_display_update_notice_check_failed(mock_print, mock_check):
-    """Test no notice when update check fails."""
-    mock_check.return_value = None
+def test_display_update_notice(mock_print, mock_check, check_result, expect_printed):
+    """Test that a notice is printed only when an update is available."""
+    mock_check.return_value = check_result
     
     display_update_notice()
     
-    # Check that no update notice was printed
-    mock_print.assert_not_called()
\ No newline at end of file
+    if expect_printed:
+        calls = [str(call) for call in mock_print.call_args_list]
+        assert any("new version" in call.lower() for call in calls)
+        assert any("1.0.0" in call for call in calls)
+        assert any("2.0.0" in call for call in calls)
+    else:
+        mock_print.assert_not_called()
\ No newline at end of file